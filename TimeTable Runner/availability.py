@@ -0,0 +1,320 @@
+import argparse
+import json
+import sys
+from bisect import bisect_right
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from intervals import format_minutes, merge_intervals, parse_range, to_minutes
+from cache import load_cached_timetable
+from loader import SHARED_KEYS, load_rooms
+
+# Query kinds and the lesson column each one indexes
+KINDS = {"room": "Room", "faculty": "Faculty"}
+
+WEEK = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Days every room and faculty member is indexed for, booked or not
+DEFAULT_DAYS = WEEK[:5]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Bookings of one room or faculty member on one day:
+#   busy         merged (start, end) ranges in use, sorted
+#   free         the gaps between them within the teaching day, sorted
+#   free_starts, free_ends   the same gaps, for bisecting
+#   longest      sparse table over the gap lengths: longest[k][i] is the
+#                longest of free[i:i + 2**k], for first-fit searches
+DaySchedule = namedtuple("DaySchedule", ["busy", "free", "free_starts", "free_ends", "longest"])
+
+# schedules  {kind: {key: {day: DaySchedule}}}, keys sorted
+# rooms      {room number: loader.Room} from rooms.csv (may be empty)
+# days       the indexed days, in week order
+# bounds     (start, end) minutes of the teaching day
+AvailabilityIndex = namedtuple("AvailabilityIndex", ["schedules", "rooms", "days", "bounds"])
+
+
+def _sparse_max(values):
+    table = [list(values)]
+    width = 1
+    while 2 * width <= len(values):
+        previous = table[-1]
+        table.append([max(previous[i], previous[i + width])
+                      for i in range(len(values) - 2 * width + 1)])
+        width *= 2
+    return table
+
+
+# Schedule of one key on one day from its (start, end) lessons
+def day_schedule(intervals, bounds):
+    busy = merge_intervals(intervals)
+    day_start, day_end = bounds
+    free = []
+    at = day_start
+    for start, end in busy:
+        if min(start, day_end) > at:
+            free.append((at, min(start, day_end)))
+        at = max(at, end)
+    if at < day_end:
+        free.append((at, day_end))
+    return DaySchedule(busy=busy, free=free, free_starts=[start for start, _ in free],
+                       free_ends=[end for _, end in free],
+                       longest=_sparse_max([end - start for start, end in free]))
+
+
+# Index every room and faculty member of the solver output. Rooms listed in
+# `rooms` (see loader.load_rooms) are included even when never booked.
+# `bounds` is the teaching day in minutes, by default from the first class
+# start to the last class end of the whole timetable.
+def build_availability(lessons, rooms=None, bounds=None):
+    rooms = rooms or {}
+    if bounds is None:
+        if not lessons:
+            raise ValueError("no lessons to take the teaching day from; pass bounds")
+        bounds = (min(lesson.Start for lesson in lessons), max(lesson.End for lesson in lessons))
+    booked_days = set(DEFAULT_DAYS).union(lesson.Day for lesson in lessons)
+    days = [day for day in WEEK if day in booked_days]
+
+    schedules = {}
+    for kind, column in KINDS.items():
+        shared = SHARED_KEYS.get(column, set())
+        by_key = {number: {} for number in rooms} if kind == "room" else {}
+        for lesson in lessons:
+            key = getattr(lesson, column)
+            if key and key not in shared:
+                by_key.setdefault(key, {}).setdefault(lesson.Day, []).append((lesson.Start,
+                                                                              lesson.End))
+        schedules[kind] = {key: {day: day_schedule(by_day.get(day, ()), bounds) for day in days}
+                           for key, by_day in sorted(by_key.items())}
+    return AvailabilityIndex(schedules=schedules, rooms=rooms, days=days, bounds=bounds)
+
+
+# Index a solver output file, with room types from an optional rooms.csv
+# (`cache_dir` as for cache.load_cached_timetable)
+def load_availability(final_csv, rooms_csv=None, cache_dir=None):
+    return build_availability(load_cached_timetable(final_csv, cache_dir=cache_dir),
+                              load_rooms(rooms_csv) if rooms_csv else None)
+
+
+# Full day name of "Tuesday", "tue", ...
+def parse_day(index, day):
+    name = str(day).strip().lower()
+    for known in index.days:
+        if name in (known.lower(), known[:3].lower()):
+            return known
+    raise ValueError(f"unknown day {day!r}, expected one of {', '.join(index.days)}")
+
+
+def keys(index, kind):
+    if kind not in index.schedules:
+        raise ValueError(f"unknown kind {kind!r}, expected one of {', '.join(KINDS)}")
+    return index.schedules[kind]
+
+
+def schedule(index, kind, key, day):
+    by_key = keys(index, kind)
+    if key not in by_key:
+        raise ValueError(f"unknown {kind} {key!r}")
+    return by_key[key][parse_day(index, day)]
+
+
+def _check_range(start, end):
+    if end is not None and end <= start:
+        raise ValueError(f"empty time range {format_minutes(start)}-{format_minutes(end)}")
+
+
+# True if `key` is free for all of start..end (minutes), or at the minute
+# `start` when there is no end: one bisect over the day's free ranges
+def is_free(index, kind, key, day, start, end=None):
+    _check_range(start, end)
+    agenda = schedule(index, kind, key, day)
+    i = bisect_right(agenda.free_starts, start) - 1
+    return i >= 0 and agenda.free_ends[i] >= (start + 1 if end is None else end)
+
+
+# Rooms or faculty free for all of start..end on `day`, in key order;
+# rooms can be restricted to some of the rooms.csv types
+def free_keys(index, kind, day, start, end=None, types=None):
+    _check_range(start, end)
+    candidates = keys(index, kind)
+    if types:
+        if kind != "room":
+            raise ValueError("only rooms have types")
+        types = set(types)
+        candidates = [key for key in candidates
+                      if key in index.rooms and index.rooms[key].type in types]
+    return [key for key in candidates if is_free(index, kind, key, day, start, end)]
+
+
+# First free range of at least `minutes` on one day, from `after` on.
+# Ranges that are too short are skipped a power-of-two block at a time
+# using the sparse table, so the search is logarithmic.
+def _first_fit(agenda, minutes, after=None):
+    i = 0
+    if after is not None:
+        i = bisect_right(agenda.free_starts, after) - 1
+        if i >= 0 and agenda.free_ends[i] - after >= minutes:
+            return after, agenda.free_ends[i]
+        i += 1
+    for k in range(len(agenda.longest) - 1, -1, -1):
+        row = agenda.longest[k]
+        if i < len(row) and row[i] < minutes:
+            i += 1 << k
+    return agenda.free[i] if i < len(agenda.free) else None
+
+
+# First time `key` is free for at least `minutes`, searching from `after`
+# on `day` (default: the start of the week) through the rest of the week.
+# Returns (day, start, end) of the free range, or None.
+def first_free(index, kind, key, minutes, day=None, after=None):
+    if minutes <= 0:
+        raise ValueError(f"invalid length {minutes} minutes")
+    first_day = index.days.index(parse_day(index, day)) if day is not None else 0
+    for position in range(first_day, len(index.days)):
+        found = _first_fit(schedule(index, kind, key, index.days[position]), minutes,
+                           after if position == first_day else None)
+        if found is not None:
+            return (index.days[position], *found)
+    return None
+
+
+def _times(ranges):
+    return [[format_minutes(start), format_minutes(end)] for start, end in ranges]
+
+
+# The query parameters shared by the HTTP routes
+def _param(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"missing parameter {name!r}")
+        return default
+    return values[-1]
+
+
+def _time_param(params):
+    if "time" in params:
+        return parse_range(_param(params, "time"))
+    if "at" in params:
+        return to_minutes(_param(params, "at")), None
+    raise ValueError("give time=HH:MM-HH:MM or at=HH:MM")
+
+
+def _route_keys(index, params):
+    kind = _param(params, "kind", "room")
+    if kind != "room":
+        return {kind: list(keys(index, kind))}
+    rooms = []
+    for key in keys(index, kind):
+        room = index.rooms.get(key)
+        rooms.append({"room": key, "type": room.type, "capacity": room.capacity} if room
+                     else {"room": key})
+    return {"rooms": rooms}
+
+
+def _route_free(index, params):
+    kind = _param(params, "kind", "room")
+    day = parse_day(index, _param(params, "day"))
+    start, end = _time_param(params)
+    types = [t for value in params.get("type", []) for t in value.split(",") if t]
+    return {"kind": kind, "day": day, "free": free_keys(index, kind, day, start, end, types)}
+
+
+def _route_is_free(index, params):
+    start, end = _time_param(params)
+    return {"free": is_free(index, _param(params, "kind", "room"), _param(params, "key"),
+                            _param(params, "day"), start, end)}
+
+
+def _route_first_free(index, params):
+    try:
+        minutes = int(_param(params, "minutes"))
+    except ValueError:
+        raise ValueError("minutes must be a whole number") from None
+    after = to_minutes(params["after"][-1]) if params.get("after") else None
+    found = first_free(index, _param(params, "kind", "room"), _param(params, "key"), minutes,
+                       params["day"][-1] if params.get("day") else None, after)
+    if found is None:
+        return {"slot": None}
+    day, start, end = found
+    return {"slot": {"day": day, "start": format_minutes(start), "end": format_minutes(end)}}
+
+
+def _route_schedule(index, params):
+    kind, key = _param(params, "kind", "room"), _param(params, "key")
+    agendas = {day: schedule(index, kind, key, day) for day in index.days}
+    return {"kind": kind, "key": key,
+            "days": {day: {"busy": _times(agenda.busy), "free": _times(agenda.free)}
+                     for day, agenda in agendas.items()}}
+
+
+# GET /keys?kind=room
+# GET /free?kind=room&day=Tue&time=14:00-15:30&type=COMPUTER_LAB,HARDWARE_LAB
+# GET /is-free?kind=faculty&key=...&day=Tue&at=14:00
+# GET /first-free?kind=faculty&key=...&minutes=90[&day=Tue&after=12:00]
+# GET /schedule?kind=room&key=L206
+ROUTES = {"/keys": _route_keys, "/free": _route_free, "/is-free": _route_is_free,
+          "/first-free": _route_first_free, "/schedule": _route_schedule}
+
+
+# Request handler answering the ROUTES from `index` as JSON
+def make_handler(index):
+    class AvailabilityHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            route = ROUTES.get(url.path)
+            if route is None:
+                self._send(404, {"error": f"unknown path {url.path}",
+                                 "paths": sorted(ROUTES)})
+                return
+            try:
+                body = route(index, parse_qs(url.query))
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(200, body)
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return AvailabilityHandler
+
+
+def make_server(index, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), make_handler(index))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve room and faculty availability from the solver output over HTTP.")
+    parser.add_argument("final_csv", nargs="?", default="final_timetable.csv",
+                        help="solver output CSV (default: final_timetable.csv)")
+    parser.add_argument("--rooms", dest="rooms_csv",
+                        help="the solver's rooms.csv, for room types and rooms that are never booked")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="keep the parsed timetable in DIR so runs on unchanged inputs skip parsing")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+
+    index = load_availability(args.final_csv, args.rooms_csv, args.cache_dir)
+    server = make_server(index, args.host, args.port)
+    print(f"Serving availability of {len(index.schedules['room'])} rooms and "
+          f"{len(index.schedules['faculty'])} faculty on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Synthetic-scale benchmarks for the timetable rendering pipeline.
+# Run from the "TimeTable Runner" directory:  python -m benchmarks --help
@@ -0,0 +1,134 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import BytesIO, StringIO
+
+from finalRun import (FIXED_TIMESTAMP, build_batch_grid, build_batch_layout,
+                      find_breaks_and_empty_periods, process_timetable, split_batches, write_grid)
+from cache import load_cached_timetable
+from intervals import DEFAULT_BREAK_WINDOWS, compile_break_windows
+from lattice import build_lattice, lesson_lattice
+from layout import RENDER_MODES
+from loader import load_timetable
+from render_xlsx import build_workbook, workbook_bytes
+
+from benchmarks.synthetic import generate_timetable
+
+
+# Best wall time over `repeat` runs, then peak traced memory of one more run
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(csv_path, repeat=3, render_mode="standard", workers=1, stream=False,
+                   cache_dir=None):
+    windows = compile_break_windows(DEFAULT_BREAK_WINDOWS)
+    lessons = load_timetable(csv_path)
+    # Fill the cache up front so every timed "cached load" run is a hit
+    load_cached_timetable(csv_path, cache_dir=cache_dir)
+    frames = split_batches(lessons)
+    lattice = lesson_lattice(lessons)
+    layouts = [build_batch_layout(batch, batch_lessons, windows, "Institution", "Session",
+                                  lattice=lattice)
+               for batch, batch_lessons in frames]
+    grids = [build_batch_grid(batch, batch_lessons, windows, "Institution", "Session",
+                              lattice=lattice)
+             for batch, batch_lessons in frames]
+
+    def render(fmt):
+        return lambda: [write_grid(grid, fmt, BytesIO(), FIXED_TIMESTAMP) for grid in grids]
+
+    def full_run():
+        with tempfile.TemporaryDirectory() as out, redirect_stdout(StringIO()):
+            process_timetable(csv_path, output_dir=out, render_mode=render_mode,
+                              workers=workers, stream=stream)
+
+    stages = [
+        ("load", lambda: load_timetable(csv_path)),
+        ("cached load", lambda: load_cached_timetable(csv_path, cache_dir=cache_dir)),
+        ("slot lattice", lambda: build_lattice((lesson.Start, lesson.End) for lesson in lessons)),
+        ("breaks + free periods", lambda: [find_breaks_and_empty_periods(batch_lessons, lattice.slots, windows)
+                                           for _, batch_lessons in frames]),
+        ("grid fill", lambda: [build_batch_layout(batch, batch_lessons, windows, "Institution", "Session",
+                                                  lattice=lattice)
+                               for batch, batch_lessons in frames]),
+        ("xlsx save", lambda: [workbook_bytes(build_workbook([layout], render_mode), FIXED_TIMESTAMP)
+                               for layout in layouts]),
+        ("html render", render("html")),
+        ("json render", render("json")),
+        ("ics render", render("ics")),
+        ("full run", full_run),
+    ]
+    results = []
+    for name, fn in stages:
+        seconds, peak = measure(fn, repeat)
+        results.append({"stage": name, "seconds": seconds, "peak_bytes": peak})
+    return {"lessons": len(lessons), "batches": len(frames), "stages": results}
+
+
+def format_report(report):
+    lines = [f"{report['lessons']} lessons, {report['batches']} batches",
+             f"{'stage':<24}{'time (s)':>12}{'peak MiB':>12}"]
+    for row in report["stages"]:
+        lines.append(f"{row['stage']:<24}{row['seconds']:>12.4f}{row['peak_bytes'] / 2**20:>12.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the timetable pipeline on synthetic data.")
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots-per-day", type=int, default=5)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--faculty", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (best is reported)")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="standard")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="workers for the full run")
+    parser.add_argument("--stream", action="store_true", help="use streaming ingest for the full run")
+    parser.add_argument("--csv", help="benchmark an existing solver output instead of synthetic data")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, "final_timetable.csv")
+            generate_timetable(csv_path, batches=args.batches, days=args.days,
+                               slots_per_day=args.slots_per_day, rooms=args.rooms,
+                               faculty=args.faculty, seed=args.seed)
+        # The cached load stage reads back a cache written before timing
+        report = run_benchmarks(csv_path, repeat=args.repeat, render_mode=args.render_mode,
+                                workers=args.workers, stream=args.stream,
+                                cache_dir=os.path.join(tmp, "cache"))
+
+    report["parameters"] = vars(args)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
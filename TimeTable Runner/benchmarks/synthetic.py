@@ -0,0 +1,51 @@
+import csv
+import random
+
+from intervals import format_range, to_minutes
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+LESSON_TYPES = ["LECTURE", "LECTURE", "LECTURE", "TUTORIAL", "PRACTICAL"]
+
+# Lesson lengths (minutes) seen in real solver output
+DURATIONS = [60, 90, 90, 120]
+
+
+# Write a final_timetable.csv-shaped file (including the "#final_timetable.csv"
+# comment line the Java app emits) and return the number of lessons written.
+# Each batch gets up to `slots_per_day` lessons per day starting at 09:00,
+# with short random gaps, drawn from its own set of courses.
+def generate_timetable(path, batches=16, days=5, slots_per_day=5, rooms=40, faculty=40,
+                       courses_per_batch=6, seed=0):
+    rng = random.Random(seed)
+    day_names = DAY_NAMES[:days]
+    room_names = [str(100 + i) for i in range(rooms)]
+    faculty_names = [f"Dr. Faculty {i}" for i in range(faculty)]
+    lessons = 0
+    with open(path, "w", newline="") as f:
+        f.write("#final_timetable.csv\n")
+        writer = csv.writer(f)
+        writer.writerow(["Day", "Time", "Room", "Batch", "Course", "Type", "Faculty"])
+        rows = []
+        for b in range(batches):
+            batch = f"BATCH_{b:04d}"
+            courses = [(f"Course {b}-{c}", rng.choice(faculty_names))
+                       for c in range(courses_per_batch)]
+            home_room = rng.choice(room_names)
+            for day in day_names:
+                start = to_minutes("09:00")
+                for _ in range(slots_per_day):
+                    end = start + rng.choice(DURATIONS)
+                    if end > to_minutes("20:00"):
+                        break
+                    course, teacher = rng.choice(courses)
+                    lesson_type = rng.choice(LESSON_TYPES)
+                    room = rng.choice(room_names) if lesson_type == "PRACTICAL" else home_room
+                    rows.append((day, format_range(start, end), room, batch, course,
+                                 lesson_type, teacher))
+                    start = end + rng.choice([0, 15, 15, 30, 60])
+        # The solver writes lessons grouped by day, not by batch
+        rows.sort(key=lambda row: day_names.index(row[0]))
+        writer.writerows(rows)
+        lessons = len(rows)
+    return lessons
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from loader import Lesson, load_timetable
+
+# Bump whenever the file layout or the meaning of a column changes
+CACHE_VERSION = 1
+
+MAGIC = b"TTCACHE\x00"
+CACHE_SUFFIX = ".ttcache"
+
+# Cache files kept per directory; the least recently used go first
+MAX_CACHE_ENTRIES = 8
+
+# Lesson fields stored as codes into the shared string table, and the ones
+# stored as minutes
+STRING_COLUMNS = Lesson._fields[:-2]
+MINUTE_COLUMNS = Lesson._fields[-2:]
+
+# array typecodes of the two column kinds, and the width they must have
+_CODE, _MINUTE = "I", "H"
+_WIDTHS = {_CODE: 4, _MINUTE: 2}
+
+
+def _pad(length):
+    return -length % 8
+
+
+# Hash of everything the parsed timetable depends on: both files' bytes
+# and the cache version (a courses CSV that does not exist counts as empty)
+def source_hash(final_csv, courses_csv=None):
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode("ascii"))
+    for path in (final_csv, courses_csv):
+        digest.update(b"\x00")
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, digest + CACHE_SUFFIX)
+
+
+# Write lessons column by column: a header with the row count, the string
+# table and the position of each column, then one packed native array per
+# column, each starting on an 8-byte boundary
+def write_cache(path, lessons):
+    strings = {}
+    columns = {}
+    for i, name in enumerate(STRING_COLUMNS):
+        columns[name] = array(_CODE, [strings.setdefault(lesson[i], len(strings))
+                                      for lesson in lessons])
+    for name in MINUTE_COLUMNS:
+        i = Lesson._fields.index(name)
+        columns[name] = array(_MINUTE, [lesson[i] for lesson in lessons])
+
+    layout = {}
+    offset = 0
+    for name, values in columns.items():
+        layout[name] = [values.typecode, offset]
+        size = len(values) * values.itemsize
+        offset += size + _pad(size)
+    header = json.dumps({"version": CACHE_VERSION, "byteorder": sys.byteorder,
+                         "rows": len(lessons), "strings": list(strings),
+                         "columns": layout}, ensure_ascii=False).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(4, "little") + header
+    prefix += bytes(_pad(len(prefix)))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for values in columns.values():
+            values.tofile(f)
+            f.write(bytes(_pad(len(values) * values.itemsize)))
+    os.replace(tmp_path, path)
+
+
+# Map a cache file and rebuild the lessons from its columns. The file is
+# only read through the mapping: no text is parsed apart from the header.
+# Raises ValueError for a file this version cannot read.
+def read_cache(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a timetable cache")
+        start = len(MAGIC) + 4
+        header_length = int.from_bytes(mapped[len(MAGIC):start], "little")
+        header = json.loads(mapped[start:start + header_length].decode("utf-8"))
+        if header.get("version") != CACHE_VERSION or header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{path}: written by another version or platform")
+        base = start + header_length + _pad(start + header_length)
+        rows = header["rows"]
+        strings = [sys.intern(value) for value in header["strings"]]
+
+        columns = []
+        try:
+            for name in Lesson._fields:
+                typecode, offset = header["columns"][name]
+                if array(typecode).itemsize != _WIDTHS[typecode]:
+                    raise ValueError(f"{path}: unsupported column width on this platform")
+                size = rows * _WIDTHS[typecode]
+                if base + offset + size > len(mapped):
+                    raise ValueError(f"{path}: truncated")
+                columns.append(memoryview(mapped)[base + offset:base + offset + size].cast(typecode))
+            decoded = [list(map(strings.__getitem__, column))
+                       for column in columns[:len(STRING_COLUMNS)]]
+            decoded += [column.tolist() for column in columns[len(STRING_COLUMNS):]]
+        finally:
+            # The mapping cannot be closed while a view into it is alive
+            for column in columns:
+                column.release()
+    return list(map(Lesson._make, zip(*decoded)))
+
+
+# Drop all but the most recently used cache files
+def prune_cache(cache_dir, keep=MAX_CACHE_ENTRIES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_SUFFIX):
+            path = os.path.join(cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    for _, path in sorted(entries, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# load_timetable through a binary columnar cache in `cache_dir`, keyed by
+# the hash of the solver output and courses CSV. A hit maps the cache file
+# instead of parsing CSV text; a miss parses as usual and writes the cache.
+# Without a cache_dir, or for inputs that are not files, this is plain
+# load_timetable. `stats`, if given, gets "cache": "hit", "miss" or "off".
+def load_cached_timetable(final_csv, courses_csv=None, cache_dir=None, stats=None):
+    stats = {} if stats is None else stats
+    if cache_dir is None or not isinstance(final_csv, (str, os.PathLike)) or not (
+            courses_csv is None or isinstance(courses_csv, (str, os.PathLike))):
+        stats["cache"] = "off"
+        return load_timetable(final_csv, courses_csv)
+
+    path = cache_path(cache_dir, source_hash(final_csv, courses_csv))
+    try:
+        lessons = read_cache(path)
+    except (OSError, ValueError, KeyError):
+        pass
+    else:
+        stats["cache"] = "hit"
+        os.utime(path)
+        return lessons
+
+    lessons = load_timetable(final_csv, courses_csv)
+    stats["cache"] = "miss"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_cache(path, lessons)
+        prune_cache(cache_dir)
+    except OSError as e:
+        # A cache that cannot be written only costs the next run a parse
+        print(f"⚠️ Could not write timetable cache {path}: {e}")
+    return lessons
@@ -1,490 +1,715 @@
-import pandas as pd
+import argparse
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Alignment, Border, Side, Font
-from openpyxl.utils import get_column_letter
-from datetime import datetime, timedelta
-
-def process_timetable(final_csv, courses_csv=None, institution_name="INDIAN INSTITUTE OF INFORMATION TECHNOLOGY", 
-                     academic_session="Academic Session 2024-25"):
-    # Read the timetable data
-    df = pd.read_csv(final_csv)
-    df.columns = df.columns.str.strip()
+import time
+from collections import Counter, deque, namedtuple
+from operator import attrgetter
+from datetime import date, datetime, timedelta, timezone
+
+from intervals import (DEFAULT_BREAK_WINDOWS, compile_break_windows, detect_gaps,
+                       format_range, intervals_by_day)
+from lattice import column_span, lesson_lattice, shared_lattice
+from cache import load_cached_timetable
+from loader import load_timetable
+from metrics import PROFILE_MODES, Metrics, NullMetrics, capture, stop_inherited_profiling, timed
+from manifest import batch_hash, is_up_to_date, load_manifest, save_manifest
+from partition import DEFAULT_CHUNKSIZE, iter_batch_partitions, scan_time_ranges
+from grid import CourseRow, GridCell, GridDay, TimetableGrid
+from layout import RENDER_MODES, sheet_layout
+from validate import check_timetable, first_data_line
+from watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, watch_files
+from views import BATCH_VIEW, VIEWS, get_views, iter_view_lessons, view_file_name, view_label
+
+DEFAULT_INSTITUTION = "INDIAN INSTITUTE OF INFORMATION TECHNOLOGY"
+DEFAULT_SESSION = "Academic Session 2024-25"
+
+# Used when there is no source file to take a timestamp from (also the
+# earliest date a zip entry can carry)
+FIXED_TIMESTAMP = datetime(1980, 1, 1)
+
+# Days order (abbreviated to match the example image)
+DAYS_ORDER = {"Monday": "MON", "Tuesday": "TUE", "Wednesday": "WED", 
+              "Thursday": "THU", "Friday": "FRI", "Saturday": "SAT"}
+
+FULL_DAYS = {abbr: day for day, abbr in DAYS_ORDER.items()}
+
+SHORT_DAYS = ["MON", "TUE", "WED", "THU", "FRI"]
+
+BREAK_COURSES = ["Break", "Lunch", "Free"]
+
+# Output formats, each rendered from the same grid (see write_grid)
+OUTPUT_FORMATS = ("xlsx", "html", "json", "ics")
+
+# Color options for course cells
+COURSE_COLORS = ['FFCCFF', 'CCFFCC', '9999FF', 'FFFF99', 
+                 'FF9999', '99FFFF', 'FFCC99', 'CC99FF']
+
+
+# Color of a course within one grid: courses get the colors in order of
+# first appearance, so up to len(COURSE_COLORS) courses never share one and
+# the result only depends on the grid's own lessons
+def course_color(course_colors, course):
+    if course not in course_colors:
+        course_colors[course] = COURSE_COLORS[len(course_colors) % len(COURSE_COLORS)]
+    return course_colors[course]
+
+
+# A standard break or free period placed into a batch's grid; same fields
+# as a lesson's solver columns plus the text shown in the cell
+Gap = namedtuple("Gap", ["Day", "Time", "Start", "End", "Room", "Batch", "Course", "Type",
+                         "Faculty", "Details"])
+
+
+# Find standard breaks and empty periods (gaps between classes) in one
+# sweep per day over the timetable's slots; each one covers a run of slots
+def find_breaks_and_empty_periods(lessons, all_slots, windows):
+    break_entries = []
+    empty_entries = []
+    batch = lessons[0].Batch if lessons else "UNKNOWN"
     
-    # Process courses info if available
-    courses_info = {}
-    if courses_csv and os.path.exists(courses_csv):
-        courses_df = pd.read_csv(courses_csv)
-        for _, row in courses_df.iterrows():
-            courses_info[row["Course"]] = {
-                "name": row.get("Course_Name", ""),
-                "credits": row.get("Credits", "3-0-0-3"),
-                "faculty": row.get("Faculty", "")
-            }
+    intervals = ((lesson.Start, lesson.End) for lesson in lessons)
+    by_day = intervals_by_day([lesson.Day for lesson in lessons], intervals)
     
-    # Function to parse time string to datetime
-    def parse_time(time_str):
-        return datetime.strptime(time_str, '%H:%M')
+    for day, (breaks, empty) in detect_gaps(by_day, all_slots, windows).items():
+        for window, first, stop in breaks:
+            start, end = all_slots[first][0], all_slots[stop - 1][1]
+            break_entries.append(Gap(day, format_range(start, end), start, end, "N/A", batch,
+                                     window.course, "BREAK", "N/A", window.details))
+        for first, stop in empty:
+            start, end = all_slots[first][0], all_slots[stop - 1][1]
+            empty_entries.append(Gap(day, format_range(start, end), start, end, "N/A", batch,
+                                     "Free", "BREAK", "N/A", "Free Period"))
     
-    # Detect all time points for each batch
-    def get_time_points_for_batch(batch_df):
-        time_points = set()
-        
-        for time_slot in batch_df["Time"].unique():
-            try:
-                start_str, end_str = time_slot.split('-')
-                time_points.add(parse_time(start_str))
-                time_points.add(parse_time(end_str))
-            except:
-                continue
-                
-        return sorted(time_points)
+    return break_entries, empty_entries
+
+
+# Place entries on the lattice columns of each day, first come first
+# served: an entry takes the columns it covers, cut short where an earlier
+# entry already sits, and is dropped if its first column is taken.
+# Returns {day: {first column: (entry, span)}}.
+def place_entries(entries, lattice, days):
+    columns = len(lattice.slots)
+    taken = {day: bytearray(columns) for day in days}
+    placed = {day: {} for day in days}
+    for entry in entries:
+        row = taken.get(entry.Day)
+        if row is None:
+            continue
+        first, span = column_span(lattice, entry.Start, entry.End)
+        if first >= columns or row[first]:
+            continue
+        stop = first + 1
+        while stop < min(first + span, columns) and not row[stop]:
+            stop += 1
+        row[first:stop] = b"\x01" * (stop - first)
+        placed[entry.Day][first] = (entry, stop - first)
+    return placed
+
+
+# course -> first lesson of that course, in order of first appearance
+def build_course_index(entries):
+    index = {}
+    for entry in entries:
+        index.setdefault(entry.Course, entry)
+    return index
+
+
+# Most common room of a batch; ties go to the first in sorted order
+def most_common_room(lessons):
+    counts = Counter(lesson.Room for lesson in lessons)
+    if not counts:
+        return "TBD"
+    most = max(counts.values())
+    return min(room for room, count in counts.items() if count == most)
+
+
+# Build the format-neutral grid for one batch, or one faculty member / room
+# when given another view (see views.py). The columns are those of
+# `lattice`, the whole timetable's slot lattice (see lattice.py); without
+# one, the batch's own lessons define them.
+# (`stats`, if given, collects counts and stage timings for metrics)
+def build_batch_grid(batch, lessons, windows, institution_name, academic_session, stats=None,
+                     view=BATCH_VIEW, lattice=None):
+    stats = {} if stats is None else stats
     
-    # Generate all possible time slots for each batch
-    def generate_time_slots(time_points):
-        slots = []
-        for i in range(len(time_points) - 1):
-            start = time_points[i]
-            end = time_points[i + 1]
-            
-            # Only include slots that are at least 15 minutes
-            duration = (end - start).total_seconds() / 60
-            if duration >= 15:
-                slot = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
-                slots.append(slot)
-        
-        return slots
+    # Time slots are shared by every batch of the timetable
+    with timed(stats, "slots_seconds"):
+        if lattice is None:
+            lattice = lesson_lattice(lessons)
+        all_slots = lattice.slots
     
-    # Add standard breaks to a specific batch
-    def add_breaks_for_batch(batch_df, all_slots):
-        # Define standard break times (approximate)
-        morning_break_times = [(parse_time('10:30'), parse_time('10:45')),
-                              (parse_time('10:45'), parse_time('11:00'))]
-        lunch_break_times = [(parse_time('12:15'), parse_time('13:15')),
-                            (parse_time('13:00'), parse_time('14:00'))]
-        afternoon_break_times = [(parse_time('15:45'), parse_time('16:15')),
-                                (parse_time('16:00'), parse_time('16:15'))]
-        
-        # Check if any slot overlaps with break times
-        break_entries = []
-        days = batch_df["Day"].unique()
-        batch = batch_df["Batch"].iloc[0] if not batch_df.empty else "UNKNOWN"
-        
-        for day in days:
-            day_df = batch_df[batch_df["Day"] == day]
-            
-            # Check for morning break
-            morning_break_found = False
-            for start, end in morning_break_times:
-                for slot in all_slots:
-                    slot_start, slot_end = slot.split('-')
-                    slot_start = parse_time(slot_start)
-                    slot_end = parse_time(slot_end)
-                    
-                    # If slot is entirely within break time & no classes overlap
-                    if (start <= slot_start < end and slot_end <= end):
-                        # Check if no classes overlap with this slot
-                        has_overlap = False
-                        for _, row in day_df.iterrows():
-                            class_start, class_end = row["Time"].split('-')
-                            class_start = parse_time(class_start)
-                            class_end = parse_time(class_end)
-                            
-                            if (class_start < slot_end and class_end > slot_start):
-                                has_overlap = True
-                                break
-                        
-                        if not has_overlap:
-                            break_entries.append({
-                                "Day": day,
-                                "Time": f"{slot_start.strftime('%H:%M')}-{slot_end.strftime('%H:%M')}",
-                                "Room": "N/A",
-                                "Batch": batch,
-                                "Course": "Break",
-                                "Type": "BREAK",
-                                "Faculty": "N/A",
-                                "Details": "Morning Break"
-                            })
-                            morning_break_found = True
-                            break
-                
-                if morning_break_found:
-                    break
-            
-            # Similar logic for lunch break
-            lunch_break_found = False
-            for start, end in lunch_break_times:
-                for slot in all_slots:
-                    slot_start, slot_end = slot.split('-')
-                    slot_start = parse_time(slot_start)
-                    slot_end = parse_time(slot_end)
-                    
-                    if (start <= slot_start < end and slot_end <= end):
-                        # Check if no classes overlap
-                        has_overlap = False
-                        for _, row in day_df.iterrows():
-                            class_start, class_end = row["Time"].split('-')
-                            class_start = parse_time(class_start)
-                            class_end = parse_time(class_end)
-                            
-                            if (class_start < slot_end and class_end > slot_start):
-                                has_overlap = True
-                                break
-                        
-                        if not has_overlap:
-                            break_entries.append({
-                                "Day": day,
-                                "Time": f"{slot_start.strftime('%H:%M')}-{slot_end.strftime('%H:%M')}",
-                                "Room": "N/A",
-                                "Batch": batch,
-                                "Course": "Lunch",
-                                "Type": "BREAK",
-                                "Faculty": "N/A",
-                                "Details": "Lunch Break"
-                            })
-                            lunch_break_found = True
-                            break
-                
-                if lunch_break_found:
-                    break
-            
-            # And for afternoon break
-            afternoon_break_found = False
-            for start, end in afternoon_break_times:
-                for slot in all_slots:
-                    slot_start, slot_end = slot.split('-')
-                    slot_start = parse_time(slot_start)
-                    slot_end = parse_time(slot_end)
-                    
-                    if (start <= slot_start < end and slot_end <= end):
-                        # Check if no classes overlap
-                        has_overlap = False
-                        for _, row in day_df.iterrows():
-                            class_start, class_end = row["Time"].split('-')
-                            class_start = parse_time(class_start)
-                            class_end = parse_time(class_end)
-                            
-                            if (class_start < slot_end and class_end > slot_start):
-                                has_overlap = True
-                                break
-                        
-                        if not has_overlap:
-                            break_entries.append({
-                                "Day": day,
-                                "Time": f"{slot_start.strftime('%H:%M')}-{slot_end.strftime('%H:%M')}",
-                                "Room": "N/A",
-                                "Batch": batch,
-                                "Course": "Break",
-                                "Type": "BREAK",
-                                "Faculty": "N/A",
-                                "Details": "Afternoon Break"
-                            })
-                            afternoon_break_found = True
-                            break
-                
-                if afternoon_break_found:
-                    break
-                    
-        return break_entries
+    # Add breaks and free periods
+    with timed(stats, "breaks_seconds"):
+        break_entries, empty_entries = find_breaks_and_empty_periods(lessons, all_slots, windows)
     
-    # Find empty periods (gaps between classes)
-    def find_empty_periods(batch_df, all_slots):
-        empty_entries = []
-        days = batch_df["Day"].unique()
-        batch = batch_df["Batch"].iloc[0] if not batch_df.empty else "UNKNOWN"
-        
-        for day in days:
-            day_df = batch_df[batch_df["Day"] == day]
-            used_slots = set(day_df["Time"].unique())
-            
-            for slot in all_slots:
-                if slot in used_slots:
-                    continue
-                
-                # Check if this slot overlaps with any used slot
-                slot_start, slot_end = slot.split('-')
-                slot_start = parse_time(slot_start)
-                slot_end = parse_time(slot_end)
-                
-                has_overlap = False
-                for used_slot in used_slots:
-                    used_start, used_end = used_slot.split('-')
-                    used_start = parse_time(used_start)
-                    used_end = parse_time(used_end)
-                    
-                    if (slot_start < used_end and slot_end > used_start):
-                        has_overlap = True
-                        break
-                
-                # If no overlap and not too short, add as empty period
-                if not has_overlap and (slot_end - slot_start).total_seconds() / 60 >= 20:
-                    # Check if this is already a break
-                    is_break = False
-                    for item in empty_entries:
-                        if item["Day"] == day and item["Time"] == slot:
-                            is_break = True
-                            break
-                    
-                    if not is_break:
-                        empty_entries.append({
-                            "Day": day,
-                            "Time": slot,
-                            "Room": "N/A",
-                            "Batch": batch,
-                            "Course": "Free",
-                            "Type": "BREAK",
-                            "Faculty": "N/A",
-                            "Details": "Free Period"
-                        })
-        
-        return empty_entries
+    stats.update(rows=len(lessons), slots=len(all_slots), breaks=len(break_entries),
+                 free_periods=len(empty_entries))
+    grid_start = time.perf_counter()
     
-    # Process each batch separately
-    batches = sorted(df["Batch"].unique())
+    # Combine with original data
+    combined_entries = lessons + break_entries + empty_entries
     
-    # Define colors for different types of courses
-    course_colors = {}
+    # Get classroom for this batch (most common room)
+    classroom = most_common_room(lessons)
     
-    for batch in batches:
-        # Skip 'ALL' batch if processing individually
-        if batch == "ALL":
-            continue
-            
-        # Filter for this batch
-        batch_df = df[df["Batch"] == batch]
-        
-        # Generate all possible time slots for this batch
-        time_points = get_time_points_for_batch(batch_df)
-        all_slots = generate_time_slots(time_points)
-        
-        # Add breaks and free periods
-        break_entries = add_breaks_for_batch(batch_df, all_slots)
-        empty_entries = find_empty_periods(batch_df, all_slots)
-        
-        # Combine with original data
-        combined_entries = pd.concat([
-            batch_df,
-            pd.DataFrame(break_entries),
-            pd.DataFrame(empty_entries)
-        ], ignore_index=True)
-        
-        # Days order (abbreviated to match the example image)
-        days_order = {"Monday": "MON", "Tuesday": "TUE", "Wednesday": "WED", 
-                     "Thursday": "THU", "Friday": "FRI", "Saturday": "SAT"}
-        
-        # Add short day names
-        combined_entries["ShortDay"] = combined_entries["Day"].map(days_order)
-        
-        # Get classroom for this batch (most common room)
-        classroom = batch_df["Room"].mode().iloc[0] if not batch_df.empty else "TBD"
-        
-        # Format batch name for display (e.g., "CSE A 2023" from "CSE_A_2023")
-        formatted_batch = batch.replace("_", " ")
-        
-        # Create Excel workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = str(batch)
-        
-        # Add headers
-        ws.merge_cells('A1:J1')
-        ws['A1'] = institution_name
-        ws['A1'].font = Font(bold=True, size=14, color="000080")
-        ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-        
-        ws.merge_cells('A2:J2')
-        ws['A2'] = f"Time Table for {academic_session}"
-        ws['A2'].font = Font(bold=True, size=12)
-        ws['A2'].alignment = Alignment(horizontal='center', vertical='center')
-        
-        ws.merge_cells('A3:J3')
-        ws['A3'] = f"Batch: {formatted_batch}, Class Room: {classroom}"
-        ws['A3'].font = Font(bold=True, size=11)
-        ws['A3'].alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Set up column headers - Time row
-        ws.row_dimensions[5].height = 25
-        ws['A5'] = "Time"
-        ws['A5'].fill = PatternFill(start_color="FFCC66", end_color="FFCC66", fill_type="solid")
-        ws['A5'].font = Font(bold=True)
-        
-        # Day column
-        ws['A6'] = "Day"
-        ws['A6'].fill = PatternFill(start_color="FFCC66", end_color="FFCC66", fill_type="solid")
-        ws['A6'].font = Font(bold=True)
-        
-        # Get all time slots for this batch, sorted chronologically
-        batch_time_slots = sorted(combined_entries["Time"].unique(), 
-                                 key=lambda x: parse_time(x.split('-')[0]))
-        
-        # Add time slots in header
-        for i, time_slot in enumerate(batch_time_slots, start=1):
-            col = get_column_letter(i + 1)
-            ws[f'{col}5'] = time_slot
-            ws[f'{col}5'].fill = PatternFill(start_color="FFCC66", end_color="FFCC66", fill_type="solid")
-            ws[f'{col}5'].font = Font(bold=True)
-            ws[f'{col}5'].alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Set column width based on duration
-            try:
-                start, end = time_slot.split('-')
-                start_time = parse_time(start)
-                end_time = parse_time(end)
-                duration = (end_time - start_time).total_seconds() / 60
-                
-                # Scale width based on duration
-                width = max(12, min(25, 12 + duration / 15))
-                ws.column_dimensions[col].width = width
-            except:
-                ws.column_dimensions[col].width = 15
-        
-        # Add days and populate timetable
-        short_days = ["MON", "TUE", "WED", "THU", "FRI"] 
+    # Format batch name for display (e.g., "CSE A 2023" from "CSE_A_2023")
+    formatted_batch = batch.replace("_", " ")
+    
+    # Put every entry on the lattice columns it covers, so filling the grid
+    # is a dictionary lookup per column
+    slot_entries = place_entries(combined_entries, lattice,
+                                 [FULL_DAYS[day_abbr] for day_abbr in SHORT_DAYS])
+    
+    # Add days and populate timetable
+    days = []
+    course_colors = {}
+    for day_abbr in SHORT_DAYS:
+        # Get full day name
+        full_day = FULL_DAYS.get(day_abbr)
+        day_entries = slot_entries[full_day]
         
-        for i, day_abbr in enumerate(short_days, start=0):
-            row = i + 7
-            ws[f'A{row}'] = day_abbr
-            ws[f'A{row}'].fill = PatternFill(start_color="FFCC66", end_color="FFCC66", fill_type="solid")
-            ws[f'A{row}'].font = Font(bold=True)
+        cells = []
+        col = 0
+        # Fill in the timetable
+        while col < len(all_slots):
+            # Find data for this time slot and day
+            entry, span = day_entries.get(col, (None, 1))
+            col += span
             
-            # Get full day name
-            full_day = next((d for d, abbr in days_order.items() if abbr == day_abbr), None)
-            
-            if full_day:
-                # Filter for this day
-                day_data = combined_entries[combined_entries["Day"] == full_day]
-                
-                # Fill in the timetable
-                for time_idx, time_slot in enumerate(batch_time_slots, start=1):
-                    col = get_column_letter(time_idx + 1)
-                    
-                    # Find data for this time slot and day
-                    slot_data = day_data[day_data["Time"] == time_slot]
-                    
-                    if not slot_data.empty:
-                        entry = slot_data.iloc[0]
-                        course = entry["Course"]
-                        
-                        # Determine display text and color
-                        if course in ["Break", "Lunch", "Free"]:
-                            # For breaks
-                            display_text = entry["Details"]
-                            cell_color = "DDDDDD"  # Gray for breaks
-                        else:
-                            # For regular courses
-                            if "Course_Name" in entry:
-                                course_name = entry["Course_Name"]
-                            else:
-                                course_name = courses_info.get(course, {}).get("name", course)
-                                
-                            room = entry["Room"]
-                            faculty = entry["Faculty"]
-                            course_type = entry["Type"]
-                            
-                            display_text = f"{course}\n{course_type}\nRoom: {room}\n{faculty}"
-                            
-                            # Color the cell based on course
-                            if course not in course_colors:
-                                # Generate color options
-                                colors = ['FFCCFF', 'CCFFCC', '9999FF', 'FFFF99', 
-                                         'FF9999', '99FFFF', 'FFCC99', 'CC99FF']
-                                course_colors[course] = colors[len(course_colors) % len(colors)]
-                            
-                            cell_color = course_colors[course]
-                        
-                        # Set cell value and format
-                        ws[f'{col}{row}'] = display_text
-                        ws[f'{col}{row}'].fill = PatternFill(start_color=cell_color, 
-                                                           end_color=cell_color, 
-                                                           fill_type="solid")
-                    
-                    # Apply formatting even if empty
-                    if ws[f'{col}{row}'].value is not None:
-                        ws[f'{col}{row}'].alignment = Alignment(horizontal='center', 
-                                                              vertical='center', 
-                                                              wrap_text=True)
-                        
-                    # Add borders to all cells in timetable
-                    ws[f'{col}{row}'].border = Border(left=Side(style='thin'), 
-                                                    right=Side(style='thin'),
-                                                    top=Side(style='thin'), 
-                                                    bottom=Side(style='thin'))
-        
-        # Add course information table
-        course_row = len(short_days) + 9  # Leave space after timetable
-        
-        # Add table header
-        ws[f'A{course_row}'] = "Sl.No."
-        ws[f'B{course_row}'] = "Course Code"
-        ws[f'C{course_row}'] = "Course Title"
-        ws[f'D{course_row}'] = "Credits (L-T-P-C)"
-        ws[f'E{course_row}'] = "Faculty"
-        
-        # Style header
-        for col in ['A', 'B', 'C', 'D', 'E']:
-            ws[f'{col}{course_row}'].fill = PatternFill(start_color="BBBBBB", 
-                                                      end_color="BBBBBB", 
-                                                      fill_type="solid")
-            ws[f'{col}{course_row}'].font = Font(bold=True)
-            ws[f'{col}{course_row}'].border = Border(left=Side(style='thin'), 
-                                                   right=Side(style='thin'),
-                                                   top=Side(style='thin'), 
-                                                   bottom=Side(style='thin'))
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 12
-        ws.column_dimensions['C'].width = 30
-        ws.column_dimensions['D'].width = 15
-        ws.column_dimensions['E'].width = 25
-        
-        # Get unique courses
-        unique_courses = batch_df["Course"].unique()
-        
-        # Populate course table
-        for i, course in enumerate(unique_courses, start=1):
-            if course in ["Break", "Lunch", "Free"]:
+            if entry is None:
+                cells.append(None)
                 continue
-                
-            current_row = course_row + i
             
-            # Get course information
-            course_data = batch_df[batch_df["Course"] == course].iloc[0]
-            faculty = course_data["Faculty"]
+            course = entry.Course
             
-            # Get course name and credits
-            if "Course_Name" in course_data:
-                course_name = course_data["Course_Name"]
+            # Determine display text and color
+            if course in BREAK_COURSES:
+                # For breaks
+                kind = "break"
+                display_text = getattr(entry, "Details", course)
+                cell_color = "DDDDDD"  # Gray for breaks
             else:
-                course_name = courses_info.get(course, {}).get("name", course)
+                # For regular courses
+                kind = "lesson"
+                display_text = view.cell.format(e=entry)
                 
-            credits = courses_info.get(course, {}).get("credits", "3-0-0-3")
+                # Color the cell based on course
+                cell_color = course_color(course_colors, course)
             
-            # Add to table
-            ws[f'A{current_row}'] = i
-            ws[f'B{current_row}'] = course
-            ws[f'C{current_row}'] = course_name
-            ws[f'D{current_row}'] = credits
-            ws[f'E{current_row}'] = faculty
+            cells.append(GridCell(kind, display_text, cell_color, course, entry.Type,
+                                  entry.Room, entry.Faculty, entry.Batch, entry.Start,
+                                  entry.End, span))
+        days.append(GridDay(day_abbr, full_day, cells))
+    
+    # Course table from the first row of each unique course
+    courses = []
+    for i, course_data in enumerate(build_course_index(lessons).values(), start=1):
+        course = course_data.Course
+        if course in BREAK_COURSES:
+            continue
+        # The course code gets the matching color from the timetable
+        courses.append(CourseRow(i, course, course_data.Course_Name, course_data.Credits,
+                                 course_data.Faculty, course_color(course_colors, course)))
+    
+    # Every lesson, whether or not it won its grid cells
+    day_lessons = {}
+    for lesson in sorted(lessons, key=attrgetter("Start")):
+        if lesson.Course in BREAK_COURSES:
+            continue
+        day_lessons.setdefault(lesson.Day, []).append(
+            GridCell("lesson", view.cell.format(e=lesson), course_color(course_colors, lesson.Course),
+                     lesson.Course, lesson.Type, lesson.Room, lesson.Faculty, lesson.Batch,
+                     lesson.Start, lesson.End, column_span(lattice, lesson.Start, lesson.End)[1]))
+    
+    stats["grid_seconds"] = time.perf_counter() - grid_start
+    
+    return TimetableGrid(name=view_label(view, batch), view=view.name, title=institution_name,
+                         subtitle=f"Time Table for {academic_session}",
+                         caption=view.caption.format(name=formatted_batch, classroom=classroom),
+                         time_slots=list(lattice.time_slots), days=days, courses=courses,
+                         lessons=day_lessons)
+
+
+# Lay out the sheet for one batch (see build_batch_grid)
+def build_batch_layout(batch, lessons, windows, institution_name, academic_session, stats=None,
+                       view=BATCH_VIEW, lattice=None):
+    stats = {} if stats is None else stats
+    grid = build_batch_grid(batch, lessons, windows, institution_name, academic_session, stats,
+                            view, lattice)
+    with timed(stats, "grid_seconds"):
+        layout = sheet_layout(grid)
+    stats["cells"] = sum(len(cells) for cells in layout.rows.values())
+    return layout
+
+
+# Build the workbook for one batch; openpyxl is only imported once a
+# workbook is actually needed
+def build_batch_workbook(batch, lessons, windows, institution_name, academic_session,
+                         render_mode="standard", stats=None, view=BATCH_VIEW, lattice=None):
+    from render_xlsx import build_workbook
+    layout = build_batch_layout(batch, lessons, windows, institution_name, academic_session,
+                                stats, view, lattice)
+    return build_workbook([layout], render_mode)
+
+
+# Timestamp written into the workbook properties and zip entries: honour
+# SOURCE_DATE_EPOCH, otherwise use the solver output's modification time
+# (in-memory inputs have none, so they get a fixed date)
+def build_timestamp(final_csv):
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch is None:
+        if not isinstance(final_csv, (str, os.PathLike)):
+            return FIXED_TIMESTAMP
+        epoch = os.path.getmtime(final_csv)
+    return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None)
+
+
+# Serialize a workbook with fixed timestamps (see render_xlsx)
+def workbook_bytes(wb, timestamp):
+    from render_xlsx import workbook_bytes
+    return workbook_bytes(wb, timestamp)
+
+
+def save_workbook(wb, path, timestamp):
+    with open(path, "wb") as f:
+        f.write(workbook_bytes(wb, timestamp))
+
+
+# Per-batch lessons in batch order, from a single grouping pass
+# (skip 'ALL' batch if processing individually)
+def split_batches(lessons):
+    return [(batch, batch_lessons) for _, batch, batch_lessons in iter_view_lessons(lessons, [BATCH_VIEW])]
+
+
+def batch_file_path(batch, output_dir=None, view=BATCH_VIEW, extension="xlsx"):
+    batch_file = view_file_name(view, batch, extension)
+    return os.path.join(output_dir, batch_file) if output_dir else batch_file
+
+
+# Calendar events start in the week of `term_start`; without one, in the
+# week the solver output was written
+def default_term_start(timestamp):
+    return (timestamp - timedelta(days=timestamp.weekday())).date()
+
+
+# Comma-separated --format value, checked against OUTPUT_FORMATS
+def parse_formats(value):
+    formats = [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"expected a comma-separated list of {', '.join(OUTPUT_FORMATS)}")
+    return formats
+
+
+# Comma-separated --views value, checked against views.VIEWS
+def parse_views(value):
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in VIEWS]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(f"expected a comma-separated list of {', '.join(VIEWS)}")
+    return names
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a whole number of at least 1, got {value}")
+    return number
+
+
+# Write one grid to the binary file `f` in the given output format. Each
+# renderer (and whatever it needs, e.g. openpyxl) is imported on first use.
+# Returns the number of spreadsheet cells written, if any.
+def write_grid(grid, fmt, f, timestamp, render_mode="standard", term_start=None, weeks=None):
+    if fmt == "xlsx":
+        from render_xlsx import build_workbook, workbook_bytes
+        layout = sheet_layout(grid)
+        f.write(workbook_bytes(build_workbook([layout], render_mode), timestamp))
+        return sum(len(cells) for cells in layout.rows.values())
+    if fmt == "html":
+        from render_html import write_html
+        write_html(grid, f)
+    elif fmt == "json":
+        from render_json import write_json
+        write_json(grid, f)
+    elif fmt == "ics":
+        from render_ics import write_ics
+        write_ics(grid, f, term_start or default_term_start(timestamp), timestamp, weeks)
+    else:
+        raise ValueError(f"unknown output format {fmt!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    return 0
+
+
+# Build and save one batch in every requested format; runs in the worker
+# processes when workers > 1
+# Returns the files written and the batch's stats for metrics.
+def save_batch_timetable(batch, lessons, windows, institution_name, academic_session, timestamp,
+                         render_mode="standard", output_dir=None, view=BATCH_VIEW,
+                         formats=("xlsx",), term_start=None, weeks=None, lattice=None):
+    stats = {"batch": view_label(view, batch), "bytes": 0}
+    batch_files = []
+    with timed(stats, "seconds"):
+        grid = build_batch_grid(batch, lessons, windows, institution_name, academic_session,
+                                stats, view, lattice)
+        for fmt in formats:
+            batch_file = batch_file_path(batch, output_dir, view, fmt)
+            with timed(stats, "save_seconds"), timed(stats, f"{fmt}_seconds"):
+                with open(batch_file, "wb") as f:
+                    cells = write_grid(grid, fmt, f, timestamp, render_mode, term_start, weeks)
+                    stats["bytes"] += f.tell()
+            if cells:
+                stats["cells"] = cells
+            batch_files.append(batch_file)
+    return batch_files, stats
+
+
+# Build one batch and return the workbook as bytes
+def render_batch_bytes(batch, lessons, windows, institution_name, academic_session, timestamp,
+                       render_mode="standard", lattice=None):
+    wb = build_batch_workbook(batch, lessons, windows, institution_name, academic_session,
+                              render_mode, lattice=lattice)
+    return workbook_bytes(wb, timestamp)
+
+
+# All batches as sheets of one workbook, sharing its registered styles and
+# (unless given one) a lattice over all of their lessons
+def build_combined_workbook(batch_lessons, windows, institution_name, academic_session,
+                            render_mode="standard", lattice=None):
+    from render_xlsx import build_workbook
+    if lattice is None:
+        lattice = lesson_lattice(lesson for _, lessons in batch_lessons for lesson in lessons)
+    layouts = [build_batch_layout(batch, lessons, windows, institution_name, academic_session,
+                                  lattice=lattice)
+               for batch, lessons in batch_lessons]
+    return build_workbook(layouts, render_mode)
+
+
+# Library API: yield (batch, xlsx bytes) for every batch without touching
+# the disk. `final_csv` and `courses_csv` may be paths or file objects.
+def iter_timetable_workbooks(final_csv, courses_csv=None, institution_name=DEFAULT_INSTITUTION,
+                             academic_session=DEFAULT_SESSION, break_windows=DEFAULT_BREAK_WINDOWS,
+                             render_mode="standard"):
+    lessons = load_timetable(final_csv, courses_csv)
+    windows = compile_break_windows(break_windows)
+    timestamp = build_timestamp(final_csv)
+    lattice = lesson_lattice(lessons)
+    for batch, batch_lessons in split_batches(lessons):
+        yield batch, render_batch_bytes(batch, batch_lessons, windows, institution_name,
+                                        academic_session, timestamp, render_mode, lattice)
+
+
+# Library API: every batch in one multi-sheet workbook, returned as bytes
+def render_combined_workbook(final_csv, courses_csv=None, institution_name=DEFAULT_INSTITUTION,
+                             academic_session=DEFAULT_SESSION, break_windows=DEFAULT_BREAK_WINDOWS,
+                             render_mode="standard"):
+    lessons = load_timetable(final_csv, courses_csv)
+    wb = build_combined_workbook(split_batches(lessons), compile_break_windows(break_windows),
+                                 institution_name, academic_session, render_mode,
+                                 lesson_lattice(lessons))
+    return workbook_bytes(wb, build_timestamp(final_csv))
+
+
+# Returns {"rebuilt": [...], "skipped": [...]} listing the batches written
+# and, in incremental mode, the ones left alone because nothing changed.
+# With `single_workbook` set, all batches go to that one file instead.
+# With `stream` set, the CSV is read in chunks and partitioned by batch
+# (see partition.iter_batch_partitions) instead of being loaded at once.
+# `views` picks the timetables to render: "batch", "faculty" and/or "room",
+# all grouped from the same parsed data.
+# Room, faculty and batch double bookings are reported before anything is
+# rendered (see validate.py); `strict` turns them into a ClashError. Streamed
+# input is never held whole, so it is not validated.
+# `batches` restricts the run to the timetables the named batches appear in
+# (their own, and the faculty and room timetables they share); each one
+# still gets all of its lessons and the columns of the whole solver output
+# (see lattice.py), so a filtered run writes the same files as a full one.
+# `formats` lists the outputs written per timetable ("xlsx", "html", "json",
+# "ics"); calendar events start in the week of `term_start` (a date) and
+# repeat for `weeks` weeks, or indefinitely.
+# With a `cache_dir`, the parsed timetable is kept there as a binary
+# columnar file (see cache.py) and later runs on the same inputs skip the
+# CSV parse.
+# `executor` is a process pool (of `workers` processes) to build the
+# batches in, shared with other runs; it is left running afterwards.
+def process_timetable(final_csv, courses_csv=None, institution_name=DEFAULT_INSTITUTION, 
+                     academic_session=DEFAULT_SESSION, break_windows=DEFAULT_BREAK_WINDOWS,
+                     workers=1, render_mode="standard", output_dir=None, incremental=False,
+                     single_workbook=None, stream=False, chunksize=DEFAULT_CHUNKSIZE,
+                     grouped=False, metrics=None, profile=None, profile_output=None,
+                     views=("batch",), validate=True, strict=False, batches=None,
+                     formats=("xlsx",), term_start=None, weeks=None, cache_dir=None,
+                     executor=None):
+    metrics = metrics or NullMetrics()
+    with capture(profile, metrics, profile_output), metrics.phase("run", final_csv=str(final_csv)):
+        return _process_timetable(final_csv, courses_csv, institution_name, academic_session,
+                                  break_windows, workers, render_mode, output_dir, incremental,
+                                  single_workbook, stream, chunksize, grouped, metrics,
+                                  get_views(views), validate, strict,
+                                  None if batches is None else set(batches), list(formats),
+                                  term_start, weeks, cache_dir, executor)
+
+
+def _process_timetable(final_csv, courses_csv, institution_name, academic_session, break_windows,
+                       workers, render_mode, output_dir, incremental, single_workbook, stream,
+                       chunksize, grouped, metrics, views, validate, strict, batches, formats,
+                       term_start, weeks, cache_dir, executor):
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"unknown output format {', '.join(map(repr, unknown))}, "
+                         f"expected one of {', '.join(OUTPUT_FORMATS)}")
+    if single_workbook and formats != ["xlsx"]:
+        raise ValueError("a single workbook can only be written as xlsx")
+    if weeks is not None and weeks <= 0:
+        raise ValueError(f"invalid number of weeks {weeks}, expected at least 1")
+    
+    # Break windows are configurable; resolve their ranges to minutes once
+    windows = compile_break_windows(break_windows)
+    timestamp = build_timestamp(final_csv)
+    # Resolve the calendar's first week before it goes into the batch hashes,
+    # so rebuilt and skipped calendars always agree on it
+    if "ics" in formats and term_start is None:
+        term_start = default_term_start(timestamp)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    # Read the timetable data (times parsed to minutes, course info joined in)
+    if stream:
+        if views != [BATCH_VIEW]:
+            raise ValueError("streamed input can only be rendered by batch")
+        if strict:
+            raise ValueError("streamed input is not validated; check it with validate.py instead")
+        # One quick pass over the Time column first, for the shared columns
+        with metrics.phase("lattice"):
+            lattice = shared_lattice(scan_time_ranges(final_csv))
+        if hasattr(final_csv, "seek"):
+            final_csv.seek(0)
+        sheets = ((BATCH_VIEW, batch, batch_lessons) for batch, batch_lessons in
+                  iter_batch_partitions(final_csv, courses_csv, chunksize=chunksize,
+                                        grouped=grouped)
+                  if batches is None or batch in batches)
+    else:
+        with metrics.phase("load") as record:
+            lessons = load_cached_timetable(final_csv, courses_csv, cache_dir, record)
+            record["rows"] = len(lessons)
+        if validate or strict:
+            with metrics.phase("validate") as record:
+                clashes = check_timetable(lessons, strict, first_data_line(final_csv))
+                record["clashes"] = len(clashes)
+            metrics.count("clashes", len(clashes))
+        with metrics.phase("lattice"):
+            lattice = lesson_lattice(lessons)
+        with metrics.phase("split"):
+            sheets = list(iter_view_lessons(lessons, views))
+        if batches is not None:
+            # Keep every sheet the selected batches appear in, with all of
+            # its lessons: a faculty or room sheet also shows other batches
+            sheets = [(view, key, sheet_lessons) for view, key, sheet_lessons in sheets
+                      if any(lesson.Batch in batches for lesson in sheet_lessons)]
+            missing = set(batches).difference(lesson.Batch for lesson in lessons)
+            if missing:
+                print(f"⚠️ No lessons for batch(es): {', '.join(sorted(missing))}")
+    
+    # Options that change the rendered workbook, folded into each batch hash
+    options = {"institution_name": institution_name, "academic_session": academic_session,
+               "break_windows": windows, "render_mode": render_mode,
+               "single_workbook": single_workbook, "formats": formats,
+               "term_start": term_start, "weeks": weeks,
+               "lattice": [time_slot.label for time_slot in lattice.time_slots]}
+    manifest = load_manifest(output_dir) if incremental else {}
+    # A filtered run leaves the other batches' entries alone
+    new_manifest = dict(manifest) if batches is not None else {}
+    
+    combined_file = os.path.join(output_dir or "", single_workbook) if single_workbook else None
+    
+    rebuilt = []
+    skipped = []
+    layouts = []
+    own_executor = executor is None
+    pending = deque()
+    
+    def report(batch, result):
+        batch_files, stats = result
+        rebuilt.append(batch)
+        metrics.record_batch(stats)
+        print(f"✅ Timetable saved for {batch} as {', '.join(batch_files)}")
+    
+    try:
+        # Process each batch separately, as soon as its rows are available
+        for view, key, sheet_lessons in sheets:
+            batch = view_label(view, key)
+            if incremental:
+                batch_files = ([combined_file] if combined_file else
+                               [batch_file_path(key, output_dir, view, fmt) for fmt in formats])
+                digest = batch_hash(sheet_lessons, options)
+                new_manifest[batch] = {"hash": digest,
+                                       "files": [os.path.basename(path) for path in batch_files]}
+                if is_up_to_date(manifest, batch, digest, batch_files):
+                    skipped.append(batch)
+                    if not single_workbook:
+                        continue
             
-            # Color the course code cell with matching color from timetable
-            if course in course_colors:
-                ws[f'B{current_row}'].fill = PatternFill(start_color=course_colors[course], 
-                                                       end_color=course_colors[course], 
-                                                       fill_type="solid")
+            if single_workbook:
+                stats = {"batch": batch}
+                layouts.append(build_batch_layout(key, sheet_lessons, windows, institution_name,
+                                                  academic_session, stats, view, lattice))
+                metrics.record_batch(stats)
+                continue
             
-            # Add borders
-            for col in ['A', 'B', 'C', 'D', 'E']:
-                ws[f'{col}{current_row}'].border = Border(left=Side(style='thin'), 
-                                                        right=Side(style='thin'),
-                                                        top=Side(style='thin'), 
-                                                        bottom=Side(style='thin'))
+            task = (key, sheet_lessons, windows, institution_name, academic_session,
+                    timestamp, render_mode, output_dir, view, formats, term_start, weeks, lattice)
+            if workers > 1 or not own_executor:
+                # Spread the batches over a process pool, keeping only a few
+                # in flight so streamed partitions don't pile up in memory;
+                # results are reported in submission order
+                if executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=workers,
+                                                   initializer=stop_inherited_profiling)
+                pending.append((batch, executor.submit(save_batch_timetable, *task)))
+                while len(pending) > 2 * workers:
+                    done_batch, future = pending.popleft()
+                    report(done_batch, future.result())
+            else:
+                report(batch, save_batch_timetable(*task))
         
-        # Save workbook
-        batch_file = f"{batch}_Timetable.xlsx"
-        wb.save(batch_file)
-        print(f"✅ Timetable saved for {batch} as {batch_file}")
+        while pending:
+            done_batch, future = pending.popleft()
+            report(done_batch, future.result())
+    finally:
+        if not own_executor:
+            # Leave the shared pool to the other runs
+            for _, future in pending:
+                future.cancel()
+        elif executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    if single_workbook:
+        # One file: rebuilt as a whole as soon as any batch changed
+        if not incremental or len(skipped) < len(layouts) or set(manifest) != set(new_manifest):
+            from render_xlsx import build_workbook
+            with metrics.phase("save", file=combined_file) as record:
+                wb = build_workbook(layouts, render_mode)
+                data = workbook_bytes(wb, timestamp)
+                with open(combined_file, "wb") as f:
+                    f.write(data)
+                record["bytes"] = len(data)
+            metrics.count("bytes", len(data))
+            print(f"✅ Timetables for {len(layouts)} sheets saved as {combined_file}")
+            rebuilt = [layout.title for layout in layouts]
+            skipped = []
+    
+    metrics.count("rebuilt", len(rebuilt))
+    metrics.count("skipped", len(skipped))
+    if incremental:
+        save_manifest(output_dir, new_manifest)
+        print(f"Rebuilt {len(rebuilt)} timetable(s), skipped {len(skipped)} unchanged"
+              + (f": {', '.join(skipped)}" if skipped else ""))
+    
+    return {"rebuilt": rebuilt, "skipped": skipped}
+
+
+# Keep running and re-render whenever the solver output or the courses CSV
+# changes. Libraries stay imported between runs and each run is incremental,
+# so only batches whose rows changed are rebuilt; a failed run (unreadable
+# CSV, clashes in strict mode) is reported and the watch goes on.
+def watch_timetable(final_csv, courses_csv=None, interval=DEFAULT_POLL_INTERVAL,
+                    debounce=DEFAULT_DEBOUNCE, max_runs=None, **options):
+    def run():
+        start = time.perf_counter()
+        try:
+            process_timetable(final_csv, courses_csv, incremental=True, **options)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+        print(f"Done in {time.perf_counter() - start:.2f}s, watching {final_csv} for changes...")
+    
+    watch_files([final_csv, courses_csv], run, interval, debounce, max_runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render per-batch timetable workbooks from the solver output.")
+    parser.add_argument("final_csv", nargs="?", default="final_timetable.csv",
+                        help="solver output CSV (default: final_timetable.csv)")
+    parser.add_argument("--courses", dest="courses_csv", help="CSV with Course, Course_Name, Credits columns")
+    parser.add_argument("--institution", default=DEFAULT_INSTITUTION)
+    parser.add_argument("--session", default=DEFAULT_SESSION)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes used to build workbooks (default: 1)")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="standard",
+                        help="'streaming' writes rows through a write-only workbook (default: standard)")
+    parser.add_argument("-o", "--output-dir", help="directory for the workbooks (default: current directory)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rebuild workbooks whose batch rows or options changed since the last run")
+    parser.add_argument("--single-workbook", metavar="FILE",
+                        help="write all batches as sheets of one workbook FILE instead of one file per batch")
+    parser.add_argument("--stream", action="store_true",
+                        help="read the CSV in chunks and partition it by batch to bound memory use")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows per chunk in --stream mode (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--grouped", action="store_true",
+                        help="with --stream, the CSV lists each batch's rows contiguously, "
+                             "so batches are rendered as soon as they are complete")
+    parser.add_argument("-b", "--batch", dest="batches", action="append", metavar="BATCH",
+                        help="only render this batch's lessons (repeatable)")
+    parser.add_argument("--format", dest="formats", type=parse_formats, default="xlsx",
+                        help=f"comma-separated output formats: {', '.join(OUTPUT_FORMATS)} (default: xlsx)")
+    parser.add_argument("--term-start", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="first week of the calendar events in ics output "
+                             "(default: the week the solver output was written)")
+    parser.add_argument("--term-weeks", type=positive_int, metavar="N",
+                        help="number of weekly repetitions in ics output (default: no end)")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="keep the parsed timetable in DIR so runs on unchanged inputs skip parsing")
+    parser.add_argument("--views", type=parse_views, default="batch",
+                        help="comma-separated timetables to render: batch, faculty, room (default: batch)")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail without writing anything if rooms, faculty or batches are double-booked")
+    parser.add_argument("--no-validate", dest="validate", action="store_false",
+                        help="skip the double-booking check")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and incrementally re-render whenever the input CSVs change")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"seconds between checks in --watch mode (default: {DEFAULT_POLL_INTERVAL})")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="seconds the inputs must stay unchanged before re-rendering "
+                             f"(default: {DEFAULT_DEBOUNCE})")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write per-phase and per-batch timings and counters as JSON (or JSONL for *.jsonl)")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="profile the run (in this process only; worker processes are not "
+                             "profiled) and add the top entries to the metrics")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="also dump the raw cProfile stats / tracemalloc snapshot to FILE")
+    args = parser.parse_args(argv)
+    if args.stream and args.views != ["batch"]:
+        parser.error("--stream can only render batch timetables (--views batch)")
+    metrics = Metrics() if args.metrics else None
+    
+    options = dict(institution_name=args.institution, academic_session=args.session,
+                   workers=args.workers, render_mode=args.render_mode,
+                   output_dir=args.output_dir, single_workbook=args.single_workbook,
+                   stream=args.stream, chunksize=args.chunksize, grouped=args.grouped,
+                   metrics=metrics,
+                   views=args.views,
+                   validate=args.validate, strict=args.strict, batches=args.batches,
+                   formats=args.formats,
+                   term_start=args.term_start, weeks=args.term_weeks, cache_dir=args.cache_dir)
+    if args.watch:
+        try:
+            watch_timetable(args.final_csv, args.courses_csv, args.poll_interval, args.debounce,
+                            **options)
+        except KeyboardInterrupt:
+            pass
+    else:
+        try:
+            process_timetable(args.final_csv, args.courses_csv, incremental=args.incremental,
+                              profile=args.profile, profile_output=args.profile_output, **options)
+        except ValueError as e:
+            # Clashes in strict mode and input problems found while running
+            # (e.g. --grouped input that is not grouped after all)
+            parser.exit(1, f"❌ {e}\n")
+    if args.metrics:
+        metrics.write(args.metrics)
+
 
 # Example usage
 if __name__ == "__main__":
-    process_timetable("final_timetable.csv")
+    main()
@@ -0,0 +1,31 @@
+from collections import namedtuple
+
+# Format-neutral model of one timetable, rendered by layout.sheet_layout
+# (xlsx), render_html, render_json and render_ics:
+#   name        sheet/page name ("CSE_A_2021", "Faculty Dr. X")
+#   view        "batch", "faculty" or "room"
+#   title, subtitle, caption   the three heading lines
+#   time_slots  column headers in chronological order (see lattice.py)
+#   days        one row per weekday: a cell per class, break or free period
+#               covering `span` time slots, and None for each empty slot
+#   courses     the course table below the grid
+#   lessons     {full day name: [GridCell, ...]} with every lesson in start
+#               order, including the ones that lost their grid cells to an
+#               overlapping lesson (calendars can show both)
+TimetableGrid = namedtuple("TimetableGrid", ["name", "view", "title", "subtitle", "caption",
+                                             "time_slots", "days", "courses", "lessons"])
+
+TimeSlot = namedtuple("TimeSlot", ["label", "start", "end"])
+
+# label is the short day shown in the first column ("MON"), day the full name
+GridDay = namedtuple("GridDay", ["label", "day", "cells"])
+
+# kind is "lesson" or "break" (standard breaks and free periods); text is
+# what the cell shows and color its fill; span is the number of time slots
+# it covers
+GridCell = namedtuple("GridCell", ["kind", "text", "color", "course", "type", "room", "faculty",
+                                   "batch", "start", "end", "span"])
+
+# number is the course's position among the batch's courses (breaks keep
+# their numbers, so the sequence can have gaps)
+CourseRow = namedtuple("CourseRow", ["number", "code", "name", "credits", "faculty", "color"])
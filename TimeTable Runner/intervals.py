@@ -0,0 +1,146 @@
+from collections import namedtuple
+
+# A named break window: the course label and details shown in the grid, and
+# the candidate (start, end) ranges tried in order until one fits
+BreakWindow = namedtuple("BreakWindow", ["course", "details", "candidates"])
+
+# Standard break times (approximate)
+DEFAULT_BREAK_WINDOWS = (
+    BreakWindow("Break", "Morning Break", ("10:30-10:45", "10:45-11:00")),
+    BreakWindow("Lunch", "Lunch Break", ("12:15-13:15", "13:00-14:00")),
+    BreakWindow("Break", "Afternoon Break", ("15:45-16:15", "16:00-16:15")),
+)
+
+# Shortest unused slot that is reported as a free period
+MIN_FREE_MINUTES = 20
+
+
+# Convert "HH:MM" to minutes since midnight
+def to_minutes(time_str):
+    hours, minutes = time_str.strip().split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"invalid time {time_str!r}")
+    return hours * 60 + minutes
+
+
+# Convert minutes since midnight back to "HH:MM"
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+# Parse "HH:MM-HH:MM" into a (start, end) pair of minutes
+def parse_range(range_str):
+    start_str, end_str = range_str.split('-')
+    return to_minutes(start_str), to_minutes(end_str)
+
+
+def format_range(start, end):
+    return f"{format_minutes(start)}-{format_minutes(end)}"
+
+
+# Resolve the candidate ranges of each break window to minutes once
+def compile_break_windows(break_windows):
+    compiled = []
+    for window in break_windows:
+        candidates = [parse_range(c) if isinstance(c, str) else tuple(c)
+                      for c in window.candidates]
+        compiled.append(window._replace(candidates=candidates))
+    return compiled
+
+
+# Sorted, de-duplicated time points of a set of intervals
+def collect_time_points(intervals):
+    points = set()
+    for start, end in intervals:
+        points.add(start)
+        points.add(end)
+    return sorted(points)
+
+
+# Consecutive time points become slots. None is dropped, however short:
+# every class must start and end on a slot boundary.
+def slots_from_points(points):
+    return list(zip(points, points[1:]))
+
+
+# Merge overlapping or touching intervals into a sorted list of busy ranges
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+# Sweep the (start-sorted) slots against the merged busy ranges and flag
+# each slot that no class overlaps
+def free_mask(slots, busy):
+    mask = []
+    j = 0
+    for slot_start, slot_end in slots:
+        while j < len(busy) and busy[j][1] <= slot_start:
+            j += 1
+        mask.append(not (j < len(busy) and busy[j][0] < slot_end))
+    return mask
+
+
+# For every break window, pick the first free slot that lies entirely inside
+# one of its candidate ranges (candidates are tried in order), along with
+# the free slots right after it that still fit, so a break cut up by other
+# batches' class times is placed whole.
+# Returns (window, first slot index, end slot index) triples.
+def place_breaks(slots, mask, windows):
+    placed = []
+    for window in windows:
+        for break_start, break_end in window.candidates:
+            fits = [mask[i] and break_start <= slot_start < break_end and slot_end <= break_end
+                    for i, (slot_start, slot_end) in enumerate(slots)]
+            if True in fits:
+                first = stop = fits.index(True)
+                while stop < len(slots) and fits[stop]:
+                    stop += 1
+                placed.append((window, first, stop))
+                break
+    return placed
+
+
+# Runs of free slots long enough to be shown as free periods.
+# Returns (first slot index, end slot index) pairs.
+def free_periods(slots, mask, min_length=MIN_FREE_MINUTES):
+    periods = []
+    first = None
+    for i, free in enumerate(mask + [False]):
+        if free and first is None:
+            first = i
+        elif not free and first is not None:
+            if slots[i - 1][1] - slots[first][0] >= min_length:
+                periods.append((first, i))
+            first = None
+    return periods
+
+
+# Group class intervals by day, keeping the order days first appear in
+def intervals_by_day(days, intervals):
+    by_day = {}
+    for day, interval in zip(days, intervals):
+        by_day.setdefault(day, []).append(interval)
+    return by_day
+
+
+# Run the whole detection for one batch: `by_day` maps each day to the
+# class intervals of that day, `slots` is the timetable's slot list.
+# Returns {day: (break placements, free period ranges)}; free periods
+# never overlap a placed break.
+def detect_gaps(by_day, slots, windows):
+    result = {}
+    for day, intervals in by_day.items():
+        mask = free_mask(slots, merge_intervals(intervals))
+        breaks = place_breaks(slots, mask, windows)
+        for _, first, stop in breaks:
+            mask[first:stop] = [False] * (stop - first)
+        result[day] = (breaks, free_periods(slots, mask))
+    return result
@@ -0,0 +1,59 @@
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+
+from grid import TimeSlot
+from intervals import collect_time_points, format_range, slots_from_points
+
+# The canonical time columns of a whole timetable: every class start and
+# end across all batches, cut into slots once and shared by every grid.
+# Every distinct time is a column boundary, so one batch's odd times add
+# narrow columns to the others rather than moving their classes.
+#   time_slots  grid.TimeSlot per column, in chronological order
+#   slots       the same columns as (start, end) minutes
+#   points      all column boundaries, for bisecting a class onto columns
+SlotLattice = namedtuple("SlotLattice", ["time_slots", "slots", "points"])
+
+# Lattices kept for reuse, keyed by the set of distinct class times, so a
+# re-run over the same data (watch mode, the library API) skips the work
+LATTICE_CACHE_SIZE = 8
+
+
+# Lattice of a set of (start, end) class intervals
+def build_lattice(intervals):
+    points = collect_time_points(intervals)
+    slots = slots_from_points(points)
+    return SlotLattice(time_slots=tuple(TimeSlot(format_range(start, end), start, end)
+                                        for start, end in slots),
+                       slots=tuple(slots), points=tuple(points))
+
+
+@lru_cache(maxsize=LATTICE_CACHE_SIZE)
+def _cached_lattice(intervals):
+    return build_lattice(intervals)
+
+
+# Like build_lattice, but shared between every caller with the same times
+def shared_lattice(intervals):
+    return _cached_lattice(frozenset(intervals))
+
+
+def lesson_lattice(lessons):
+    return shared_lattice((lesson.Start, lesson.End) for lesson in lessons)
+
+
+def _is_boundary(lattice, position, minutes):
+    return position < len(lattice.points) and lattice.points[position] == minutes
+
+
+# First column of a class running from `start` to `end` and the number of
+# columns it covers (at least one); the first column is past the last one
+# when the class starts at the end of the last slot. Raises ValueError for
+# a class whose start or end is not a column boundary, i.e. a lattice
+# built without its times.
+def column_span(lattice, start, end):
+    first = bisect_left(lattice.points, start)
+    stop = bisect_left(lattice.points, end)
+    if not (_is_boundary(lattice, first, start) and _is_boundary(lattice, stop, end)):
+        raise ValueError(f"class {format_range(start, end)} does not fall on the slot lattice")
+    return first, max(1, stop - first)
@@ -0,0 +1,110 @@
+from collections import namedtuple
+
+# A sheet described independently of any output library:
+#   rows    {row index: [(column index, value, style name or None), ...]}
+#   merges  range strings such as "A1:J1"
+#   widths  {column letter: width}
+#   heights {row index: height}
+SheetLayout = namedtuple("SheetLayout", ["title", "rows", "merges", "widths", "heights"])
+
+# "standard" builds cells in memory; "streaming" writes rows through a
+# write-only workbook so memory stays flat however large the sheet is
+RENDER_MODES = ("standard", "streaming")
+
+TITLE = "tt_title"
+SUBTITLE = "tt_subtitle"
+CAPTION = "tt_caption"
+LABEL = "tt_label"
+TIME_HEADER = "tt_time_header"
+GRID_CELL = "tt_grid_cell"
+TABLE_HEADER = "tt_table_header"
+TABLE_CELL = "tt_table_cell"
+
+
+# Style name of a filled grid cell holding a course or break
+def grid_style(color):
+    return f"tt_grid_{color}"
+
+
+# Style name of a course code cell in the course table
+def course_code_style(color):
+    return f"tt_code_{color}"
+
+
+# Spreadsheet column letter of a 1-based column index (1 -> A, 27 -> AA)
+def column_letter(index):
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+# Spreadsheet layout of a grid.TimetableGrid: title rows, the time header
+# and day rows, then the course table
+def sheet_layout(grid):
+    # Cells as (value, named style), keyed by row
+    rows = {}
+    def put(row, col, value, style=None):
+        rows.setdefault(row, []).append((col, value, style))
+    
+    # Add headers
+    put(1, 1, grid.title, TITLE)
+    put(2, 1, grid.subtitle, SUBTITLE)
+    put(3, 1, grid.caption, CAPTION)
+    
+    # Set up column headers - Time row and Day column
+    put(5, 1, "Time", LABEL)
+    put(6, 1, "Day", LABEL)
+    
+    # Add time slots in header
+    widths = {}
+    for i, slot in enumerate(grid.time_slots, start=1):
+        put(5, i + 1, slot.label, TIME_HEADER)
+        
+        # Scale column width based on duration
+        widths[column_letter(i + 1)] = max(12, min(25, 12 + (slot.end - slot.start) / 15))
+    
+    # Add days and populate timetable
+    merges = ["A1:J1", "A2:J2", "A3:J3"]
+    for i, day in enumerate(grid.days):
+        row = i + 7
+        put(row, 1, day.label, LABEL)
+        col = 2
+        for cell in day.cells:
+            if cell is None:
+                # Borders on all cells in timetable, even if empty
+                put(row, col, None, GRID_CELL)
+                col += 1
+                continue
+            style = grid_style(cell.color)
+            put(row, col, cell.text, style)
+            if cell.span > 1:
+                # Merge the slots a class covers; the covered cells keep the
+                # style so the merged block gets its borders
+                for covered in range(col + 1, col + cell.span):
+                    put(row, covered, None, style)
+                merges.append(f"{column_letter(col)}{row}:{column_letter(col + cell.span - 1)}{row}")
+            col += cell.span
+    
+    # Add course information table
+    course_row = len(grid.days) + 9  # Leave space after timetable
+    
+    # Add table header
+    for col, title in enumerate(["Sl.No.", "Course Code", "Course Title",
+                                 "Credits (L-T-P-C)", "Faculty"], start=1):
+        put(course_row, col, title, TABLE_HEADER)
+    
+    # Column widths
+    widths.update({'A': 8, 'B': 12, 'C': 30, 'D': 15, 'E': 25})
+    
+    for course in grid.courses:
+        current_row = course_row + course.number
+        put(current_row, 1, course.number, TABLE_CELL)
+        put(current_row, 2, course.code, course_code_style(course.color))
+        put(current_row, 3, course.name, TABLE_CELL)
+        put(current_row, 4, course.credits, TABLE_CELL)
+        put(current_row, 5, course.faculty, TABLE_CELL)
+    
+    return SheetLayout(title=grid.name, rows=rows, merges=merges,
+                       widths=widths, heights={5: 25})
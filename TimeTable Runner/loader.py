@@ -0,0 +1,185 @@
+import csv
+import io
+import os
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
+
+from intervals import parse_range
+
+# Columns written by the solver for every lesson
+TIMETABLE_COLUMNS = ["Day", "Time", "Room", "Batch", "Course", "Type", "Faculty"]
+
+DEFAULT_CREDITS = "3-0-0-3"
+
+# Placeholder keys that stand for more than one group, person or place:
+# they cannot clash with themselves and get no timetable of their own
+SHARED_KEYS = {"Batch": {"ALL"}, "Faculty": {"N/A", "Guest Faculty"}, "Room": {"N/A"}}
+
+# A room from rooms.csv; the solver output refers to it by number
+Room = namedtuple("Room", ["number", "capacity", "type"])
+
+# One lesson of the parsed timetable: the solver columns, the course name
+# and credits joined in, and the Time range in minutes since midnight
+Lesson = namedtuple("Lesson", TIMETABLE_COLUMNS + ["Course_Name", "Credits", "Start", "End"])
+
+
+# Number of leading "#..." lines, e.g. the "#final_timetable.csv" header
+# the Java app writes above the real CSV header
+def count_comment_lines(path):
+    count = 0
+    with open(path, newline='') as f:
+        for line in f:
+            if not line.lstrip().startswith('#'):
+                break
+            count += 1
+    return count
+
+
+# Text stream for a path or an open (text or binary) file object, read
+# lazily either way. A file object passed in is left open (binary ones are
+# decoded through a wrapper that is detached again afterwards).
+@contextmanager
+def _open_text(source):
+    if not hasattr(source, "read"):
+        with open(source, newline='') as f:
+            yield f
+    elif isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+        wrapper = io.TextIOWrapper(source, encoding="utf-8", newline=None)
+        try:
+            yield wrapper
+        finally:
+            wrapper.detach()
+    else:
+        yield source
+
+
+def _skip_comments(lines):
+    for line in lines:
+        if not line.lstrip().startswith('#'):
+            yield line
+            break
+    yield from lines
+
+
+# Read a CSV from a path or an open file object, skipping the leading
+# comment lines; returns the stripped header and a list of rows
+def read_csv(source):
+    with _open_text(source) as f:
+        reader = csv.reader(_skip_comments(f))
+        header = [column.strip() for column in next(reader, [])]
+        return header, [row for row in reader if row]
+
+
+# Like read_csv, but yields the rows lazily once the header is known;
+# the file stays open until the generator is exhausted or closed
+def iter_csv(source):
+    with _open_text(source) as f:
+        reader = csv.reader(_skip_comments(f))
+        yield [column.strip() for column in next(reader, [])]
+        for row in reader:
+            if row:
+                yield row
+
+
+# Course metadata keyed by course: {course: (course name, credits)}, with
+# None for values the CSV leaves out
+def load_courses(courses_csv):
+    header, rows = read_csv(courses_csv)
+    if "Course" not in header:
+        raise ValueError(f"{courses_csv}: missing 'Course' column")
+    course_at = header.index("Course")
+    name_at = header.index("Course_Name") if "Course_Name" in header else None
+    credits_at = header.index("Credits") if "Credits" in header else None
+
+    def value(row, at):
+        return row[at] if at is not None and at < len(row) and row[at] else None
+
+    # Later rows win, as they did with the old per-row dict
+    return {row[course_at]: (value(row, name_at), value(row, credits_at)) for row in rows}
+
+
+# Course metadata from an optional courses CSV (path or file object);
+# None when there is nothing to join
+def load_course_info(courses_csv):
+    if courses_csv is not None and (hasattr(courses_csv, "read") or os.path.exists(courses_csv)):
+        return load_courses(courses_csv)
+    return None
+
+
+# Rooms from the solver's rooms.csv ("id,roomNumber,capacity,type", with
+# "#" lines anywhere in the file), keyed by room number
+def load_rooms(rooms_csv):
+    with _open_text(rooms_csv) as f:
+        reader = csv.reader(line for line in f if not line.lstrip().startswith('#'))
+        header = [column.strip() for column in next(reader, [])]
+        missing = [c for c in ("roomNumber", "capacity", "type") if c not in header]
+        if missing:
+            raise ValueError(f"{rooms_csv}: missing columns {', '.join(missing)}")
+        number_at, capacity_at, type_at = (header.index(c) for c in ("roomNumber", "capacity", "type"))
+        rooms = {}
+        for row in reader:
+            if len(row) <= max(number_at, capacity_at, type_at):
+                continue
+            try:
+                capacity = int(row[capacity_at])
+            except ValueError:
+                raise ValueError(f"{rooms_csv}: invalid capacity {row[capacity_at]!r} "
+                                 f"for room {row[number_at]!r}") from None
+            rooms[row[number_at].strip()] = Room(row[number_at].strip(), capacity,
+                                                 row[type_at].strip())
+        return rooms
+
+
+def check_columns(header, source):
+    missing = [c for c in TIMETABLE_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{source}: missing columns {', '.join(missing)}")
+
+
+# Turn raw solver rows into Lessons: join course metadata and parse every
+# distinct "HH:MM-HH:MM" once. Repeated strings are interned so a large
+# timetable holds one copy of each room, batch, course and faculty name.
+def prepare_timetable(header, rows, courses=None):
+    at = [header.index(column) for column in TIMETABLE_COLUMNS]
+    # A Course_Name/Credits column in the timetable itself takes precedence
+    name_at = header.index("Course_Name") if "Course_Name" in header else None
+    credits_at = header.index("Credits") if "Credits" in header else None
+    courses = courses or {}
+    width = max(at + [name_at or 0, credits_at or 0]) + 1
+    intern = sys.intern
+    minutes = {}
+    bad = set()
+    lessons = []
+    for row in rows:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        values = [intern(row[i]) for i in at]
+        time_slot, course = values[1], values[4]
+        if not time_slot:
+            raise ValueError("missing Time values in timetable")
+        span = minutes.get(time_slot)
+        if span is None:
+            try:
+                span = minutes[time_slot] = parse_range(time_slot)
+            except ValueError:
+                bad.add(time_slot)
+                continue
+        course_name, credits = courses.get(course, (None, None))
+        if name_at is not None and row[name_at]:
+            course_name = row[name_at]
+        if credits_at is not None and row[credits_at]:
+            credits = row[credits_at]
+        lessons.append(Lesson(*values, intern(course_name or course), intern(credits or DEFAULT_CREDITS),
+                              *span))
+    if bad:
+        raise ValueError(f"unparseable Time values: {', '.join(map(repr, sorted(bad)))}")
+    return lessons
+
+
+# Load the solver output as a list of Lessons with the course name/credits
+# joined in. Both inputs may be paths or open file objects.
+def load_timetable(final_csv, courses_csv=None):
+    header, rows = read_csv(final_csv)
+    check_columns(header, final_csv)
+    return prepare_timetable(header, rows, load_course_info(courses_csv))
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+from operator import attrgetter
+
+# Kept next to the generated workbooks
+MANIFEST_NAME = ".timetable_manifest.json"
+
+# Bump whenever the workbook layout or the manifest format changes so old
+# outputs get rebuilt
+RENDER_VERSION = 5
+
+# Everything a batch's workbook is rendered from: the solver rows plus the
+# course name/credits joined in from the courses CSV
+HASH_COLUMNS = ["Day", "Time", "Room", "Batch", "Course", "Type", "Faculty",
+                "Course_Name", "Credits"]
+
+
+# Content hash of one batch: its lessons in order (order decides which
+# lesson wins a grid cell) and the options that affect rendering, which
+# include the timetable-wide time columns
+def batch_hash(lessons, options):
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"version": RENDER_VERSION, "options": options},
+                             sort_keys=True, default=str).encode("utf-8"))
+    fields = attrgetter(*HASH_COLUMNS)
+    for lesson in lessons:
+        digest.update("\x1f".join(fields(lesson)).encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+def manifest_path(output_dir):
+    return os.path.join(output_dir or ".", MANIFEST_NAME)
+
+
+# {batch: {"hash": ..., "files": [...]}}; a missing or unreadable manifest
+# simply means everything gets rebuilt
+def load_manifest(output_dir):
+    try:
+        with open(manifest_path(output_dir)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != RENDER_VERSION:
+        return {}
+    return manifest.get("batches", {})
+
+
+def save_manifest(output_dir, batches):
+    path = manifest_path(output_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": RENDER_VERSION, "batches": batches}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# True when the recorded hash matches and every output is still on disk
+def is_up_to_date(manifest, batch, digest, batch_files):
+    entry = manifest.get(batch)
+    return (entry is not None and entry.get("hash") == digest
+            and entry.get("files") == [os.path.basename(path) for path in batch_files]
+            and all(os.path.exists(path) for path in batch_files))
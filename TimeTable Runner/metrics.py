@@ -0,0 +1,136 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+# Per-batch counters summed into the run totals
+BATCH_COUNTERS = ("rows", "slots", "breaks", "free_periods", "cells", "bytes")
+
+
+# Add the wall time of the block to stats[key] (seconds). Plain dicts are
+# used so the stats can come back from worker processes.
+@contextmanager
+def timed(stats, key):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats[key] = stats.get(key, 0.0) + time.perf_counter() - start
+
+
+# Records one entry per phase or batch, plus run-wide counters
+class Metrics:
+    def __init__(self):
+        self.records = []
+        self.counters = Counter()
+
+    @contextmanager
+    def phase(self, name, **fields):
+        record = {"phase": name, **fields}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self.records.append(record)
+
+    def record_batch(self, stats):
+        self.records.append({"phase": "batch", **stats})
+        for key in BATCH_COUNTERS:
+            self.counters[key] += stats.get(key, 0)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def to_dict(self):
+        return {"records": self.records, "counters": dict(self.counters)}
+
+    # A ".jsonl" path gets one record per line (counters last), anything
+    # else a single JSON document
+    def write(self, path):
+        with open(path, "w") as f:
+            if path.endswith(".jsonl"):
+                for record in self.records:
+                    f.write(json.dumps(record, default=str) + "\n")
+                f.write(json.dumps({"phase": "counters", **self.counters}) + "\n")
+            else:
+                json.dump(self.to_dict(), f, indent=2, default=str)
+
+
+# Same interface as Metrics, recording nothing
+class NullMetrics:
+    @contextmanager
+    def phase(self, name, **fields):
+        yield {}
+
+    def record_batch(self, stats):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+# Turns off the profiling capture() has running; worker processes forked
+# during the block would otherwise inherit it
+_stop_profiling = None
+
+
+# Executor initializer for worker processes: forked workers inherit the
+# parent's cProfile or tracemalloc session, which slows every batch down
+# (skewing its timings) and collects data nobody reads
+def stop_inherited_profiling():
+    if _stop_profiling is not None:
+        _stop_profiling()
+
+
+# Run the block under cProfile or tracemalloc. cProfile stats are dumped to
+# `output` (if given) and the top functions by cumulative time are added to
+# the metrics; tracemalloc adds the peak and the top allocation sites.
+@contextmanager
+def capture(mode, metrics, output=None, top=15):
+    global _stop_profiling
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        _stop_profiling = profiler.disable
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _stop_profiling = None
+            if output:
+                profiler.dump_stats(output)
+            stats = pstats.Stats(profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+            with metrics.phase("profile", mode=mode, output=output) as record:
+                record["top"] = [{"function": f"{path}:{line}({name})", "calls": calls,
+                                  "tottime": tottime, "cumtime": cumtime}
+                                 for (path, line, name), (_, calls, tottime, cumtime, _) in rows]
+    else:
+        import tracemalloc
+        _stop_profiling = tracemalloc.stop
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _stop_profiling = None
+            if output:
+                snapshot.dump(output)
+            with metrics.phase("profile", mode=mode, output=output) as record:
+                record["peak_bytes"] = peak
+                record["top"] = [{"location": str(stat.traceback), "bytes": stat.size,
+                                  "count": stat.count}
+                                 for stat in snapshot.statistics("lineno")[:top]]
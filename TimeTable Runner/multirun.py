@@ -0,0 +1,235 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+
+from finalRun import (DEFAULT_INSTITUTION, DEFAULT_SESSION, OUTPUT_FORMATS, parse_formats,
+                      parse_views, process_timetable)
+from metrics import Metrics
+
+# One solver output to render: its inputs, headings and output directory,
+# plus any further process_timetable options (views, formats, ...)
+Job = namedtuple("Job", ["final_csv", "courses_csv", "institution_name", "academic_session",
+                         "output_dir", "options"])
+
+# What happened to one job; `error` is None when it succeeded
+JobResult = namedtuple("JobResult", ["job", "error", "seconds", "rebuilt", "skipped", "bytes",
+                                     "metrics"])
+
+JOB_FIELDS = ("final_csv", "courses_csv", "institution_name", "academic_session", "output_dir")
+
+# process_timetable options a job may set
+JOB_OPTIONS = ("views", "formats", "batches", "incremental", "validate", "strict", "render_mode",
+               "single_workbook", "term_start", "weeks", "cache_dir")
+
+# Settings that are paths, resolved against the job file's directory and
+# filled in from the solver output's path:
+#   {parent}  its directory
+#   {stem}    its file name without the extension
+PATH_SETTINGS = ("final_csv", "courses_csv", "output_dir", "cache_dir")
+
+
+# Job from a dict of settings (job file entry merged over the defaults)
+def make_job(settings):
+    unknown = set(settings).difference(JOB_FIELDS, JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown job setting(s): {', '.join(sorted(unknown))}")
+    final_csv = settings.get("final_csv")
+    if not final_csv:
+        raise ValueError("a job needs a final_csv")
+    fields = {"parent": os.path.dirname(final_csv) or ".",
+              "stem": os.path.splitext(os.path.basename(final_csv))[0]}
+
+    def fill(value):
+        if not isinstance(value, str):
+            return value
+        try:
+            return value.format(**fields)
+        except (KeyError, IndexError, ValueError):
+            raise ValueError(f"bad path template {value!r}; use {{parent}} and {{stem}}") from None
+
+    options = {name: fill(settings[name]) if name in PATH_SETTINGS else settings[name]
+               for name in JOB_OPTIONS if settings.get(name) is not None}
+    if isinstance(options.get("term_start"), str):
+        options["term_start"] = date.fromisoformat(options["term_start"])
+    return Job(final_csv=final_csv, courses_csv=fill(settings.get("courses_csv")),
+               institution_name=settings.get("institution_name") or DEFAULT_INSTITUTION,
+               academic_session=settings.get("academic_session") or DEFAULT_SESSION,
+               output_dir=fill(settings.get("output_dir")), options=options)
+
+
+# Jobs from a JSON file: a list of objects with the JOB_FIELDS and
+# JOB_OPTIONS keys, each falling back to `defaults`. Relative paths are
+# taken from the file's directory, except templates starting with a
+# placeholder: {parent} already includes that directory.
+def load_jobs(path, defaults=None):
+    with open(path) as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError(f"{path}: expected a list of job objects")
+    base = os.path.dirname(path)
+    jobs = []
+    for entry in entries:
+        entry = {key: os.path.join(base, value)
+                 if key in PATH_SETTINGS and isinstance(value, str) and not value.startswith("{")
+                 else value for key, value in entry.items()}
+        jobs.append(make_job({**(defaults or {}), **entry}))
+    return jobs
+
+
+# One job per solver output matching the glob patterns, all with `defaults`
+def jobs_from_sources(patterns, defaults=None):
+    jobs = []
+    seen = set()
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) or ([pattern] if os.path.exists(pattern) else [])
+        if not paths:
+            raise ValueError(f"no solver output matches {pattern!r}")
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                jobs.append(make_job({**(defaults or {}), "final_csv": path}))
+    return jobs
+
+
+# Two jobs writing to the same directory would overwrite each other's files
+# and incremental manifests
+def check_jobs(jobs):
+    owners = {}
+    for job in jobs:
+        target = os.path.abspath(job.output_dir or ".")
+        if target in owners:
+            raise ValueError(f"{owners[target]} and {job.final_csv} both write to {target}")
+        owners[target] = job.final_csv
+
+
+def _run_job(job, workers, executor):
+    metrics = Metrics()
+    start = time.perf_counter()
+    try:
+        result = process_timetable(job.final_csv, job.courses_csv, job.institution_name,
+                                   job.academic_session, workers=workers,
+                                   output_dir=job.output_dir, metrics=metrics, executor=executor,
+                                   **job.options)
+    except Exception as e:
+        # Any failure is reported in the summary; the other jobs go on
+        print(f"❌ {job.final_csv}: {e}")
+        return JobResult(job, f"{type(e).__name__}: {e}", time.perf_counter() - start, 0, 0, 0,
+                         metrics)
+    return JobResult(job, None, time.perf_counter() - start, len(result["rebuilt"]),
+                     len(result["skipped"]), metrics.counters["bytes"], metrics)
+
+
+# Run every job in this one process, building all of their batches on a
+# single pool of `workers` processes (and so with that pool's warm imports,
+# lattice and style caches). Up to `workers` jobs are driven at once, each
+# from its own thread, so one job's loading and validation overlaps with
+# the batches of the others. Returns a JobResult per job, in job order.
+def run_jobs(jobs, workers=1):
+    check_jobs(jobs)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if executor is not None:
+            # Start the workers while this process has a single thread:
+            # forking once the job threads run could copy a held lock
+            for future in [executor.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as threads:
+            return list(threads.map(lambda job: _run_job(job, workers, executor), jobs))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+# Table of per-job timings and outcomes, totals last, then the failures
+def format_summary(results, seconds):
+    width = max([len("Solver output")] + [len(str(r.job.final_csv)) for r in results])
+    lines = [f"{'Solver output':<{width}}  {'Status':<6}  {'Time (s)':>8}  {'Rebuilt':>7}  "
+             f"{'Skipped':>7}  {'MiB':>7}"]
+    for r in results:
+        lines.append(f"{str(r.job.final_csv):<{width}}  {'failed' if r.error else 'ok':<6}  "
+                     f"{r.seconds:>8.2f}  {r.rebuilt:>7}  {r.skipped:>7}  {r.bytes / 2**20:>7.2f}")
+    failed = [r for r in results if r.error]
+    lines.append(f"{len(results)} job(s): {len(results) - len(failed)} ok, {len(failed)} failed; "
+                 f"{sum(r.rebuilt for r in results)} timetable(s) rebuilt, "
+                 f"{sum(r.skipped for r in results)} skipped in {seconds:.2f}s")
+    lines.extend(f"❌ {r.job.final_csv}: {r.error}" for r in failed)
+    return "\n".join(lines)
+
+
+def summary_dict(results, seconds):
+    return {"seconds": seconds,
+            "jobs": [{"final_csv": str(r.job.final_csv), "output_dir": r.job.output_dir,
+                      "institution_name": r.job.institution_name,
+                      "academic_session": r.job.academic_session,
+                      "ok": r.error is None, "error": r.error, "seconds": r.seconds,
+                      "rebuilt": r.rebuilt, "skipped": r.skipped, "bytes": r.bytes,
+                      "metrics": r.metrics.to_dict()}
+                     for r in results]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render the timetables of many solver outputs in one run, sharing one worker pool.")
+    parser.add_argument("sources", nargs="*", metavar="SOURCE",
+                        help="solver output CSV or glob pattern (quote it), one job each")
+    parser.add_argument("--jobs", dest="jobs_file", metavar="FILE",
+                        help="JSON list of jobs, each with final_csv and optionally courses_csv, "
+                             "institution_name, academic_session, output_dir and other options")
+    parser.add_argument("--courses", dest="courses_csv", metavar="TEMPLATE",
+                        help="courses CSV of each job, e.g. '{parent}/courses_info.csv'")
+    parser.add_argument("--institution", default=DEFAULT_INSTITUTION)
+    parser.add_argument("--session", default=DEFAULT_SESSION)
+    parser.add_argument("-o", "--output-dir", default="{parent}/{stem}", metavar="TEMPLATE",
+                        help="output directory of each job; {parent} and {stem} are the solver "
+                             "output's directory and file name (default: {parent}/{stem}, so "
+                             "solver outputs in one directory each get their own)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="worker processes shared by all jobs (default: 1)")
+    parser.add_argument("--format", dest="formats", type=parse_formats, default="xlsx",
+                        help=f"comma-separated output formats: {', '.join(OUTPUT_FORMATS)} (default: xlsx)")
+    parser.add_argument("--views", type=parse_views, default="batch",
+                        help="comma-separated timetables to render: batch, faculty, room (default: batch)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rebuild timetables whose rows or options changed since the last run")
+    parser.add_argument("--cache-dir", metavar="TEMPLATE",
+                        help="keep the parsed timetables there so runs on unchanged inputs skip parsing")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail a job without writing anything if it has double bookings")
+    parser.add_argument("--no-validate", dest="validate", action="store_false",
+                        help="skip the double-booking check")
+    parser.add_argument("--summary", metavar="FILE", help="also write the summary as JSON")
+    args = parser.parse_args(argv)
+    if not args.sources and not args.jobs_file:
+        parser.error("give solver outputs, --jobs FILE, or both")
+
+    defaults = {"courses_csv": args.courses_csv, "institution_name": args.institution,
+                "academic_session": args.session, "output_dir": args.output_dir,
+                "formats": args.formats,
+                "views": args.views,
+                "incremental": args.incremental, "cache_dir": args.cache_dir,
+                "strict": args.strict, "validate": args.validate}
+    try:
+        jobs = load_jobs(args.jobs_file, defaults) if args.jobs_file else []
+        jobs += jobs_from_sources(args.sources, defaults)
+        check_jobs(jobs)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, args.workers)
+    seconds = time.perf_counter() - start
+    print(format_summary(results, seconds))
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary_dict(results, seconds), f, indent=2, default=str)
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import csv
+import os
+import shutil
+import tempfile
+from itertools import islice
+
+from intervals import parse_range
+from loader import check_columns, iter_csv, load_course_info, prepare_timetable
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Rows held in memory across all unfinished batches before the largest
+# buckets are spilled to temporary files
+DEFAULT_MAX_BUFFERED_ROWS = 200_000
+
+
+# Per-batch row buckets that spill to temp CSV files once too many rows
+# are buffered. Spilled rows always precede the ones still in memory, so
+# a batch comes back in file order.
+class BatchBuckets:
+    def __init__(self, max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS, spill_dir=None):
+        self.max_buffered_rows = max_buffered_rows
+        self.spill_dir = spill_dir
+        self.pieces = {}
+        self.spilled = {}
+        self.buffered_rows = 0
+        self._tmp_dir = None
+        # Spill files are numbered from a counter that never goes back, so a
+        # popped batch's number is never handed to another batch
+        self._spill_count = 0
+
+    def add(self, batch, rows):
+        self.pieces.setdefault(batch, []).extend(rows)
+        self.buffered_rows += len(rows)
+        while self.buffered_rows > self.max_buffered_rows:
+            self._spill(max(self.pieces, key=lambda b: len(self.pieces[b])))
+
+    def _spill(self, batch):
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix="timetable_spill_", dir=self.spill_dir)
+        path = self.spilled.get(batch)
+        if path is None:
+            path = os.path.join(self._tmp_dir, f"{self._spill_count}.csv")
+            self._spill_count += 1
+            self.spilled[batch] = path
+        rows = self.pieces.pop(batch)
+        with open(path, "a", newline="") as f:
+            csv.writer(f).writerows(rows)
+        self.buffered_rows -= len(rows)
+
+    def batches(self):
+        return set(self.pieces) | set(self.spilled)
+
+    # Remove and return every row of one batch, in file order
+    def pop(self, batch):
+        rows = []
+        path = self.spilled.pop(batch, None)
+        if path is not None:
+            with open(path, newline="") as f:
+                rows.extend(csv.reader(f))
+            os.remove(path)
+        buffered = self.pieces.pop(batch, [])
+        self.buffered_rows -= len(buffered)
+        rows.extend(buffered)
+        return rows
+
+    def close(self):
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+# Stream the solver output in chunks and yield (batch, lessons) pairs,
+# skipping the 'ALL' batch. Peak memory is bounded by the chunk, the spill
+# threshold and the largest single batch.
+#
+# By default batches come out in sorted order once the whole file has been
+# read. With grouped=True the file is expected to list each batch's rows
+# contiguously, and a batch is yielded as soon as the next one starts.
+def iter_batch_partitions(final_csv, courses_csv=None, chunksize=DEFAULT_CHUNKSIZE,
+                          max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS, grouped=False,
+                          spill_dir=None):
+    courses = load_course_info(courses_csv)
+    buckets = BatchBuckets(max_buffered_rows, spill_dir)
+    finished = set()
+    current = None
+    reader = iter_csv(final_csv)
+    try:
+        header = next(reader)
+        check_columns(header, final_csv)
+        batch_at = header.index("Batch")
+        while True:
+            chunk = list(islice(reader, chunksize))
+            if not chunk:
+                break
+            # Grouped input is checked run by run, in file order; otherwise
+            # a chunk's rows only need gathering per batch
+            pieces = {}
+            runs = []
+            for row in chunk:
+                batch = row[batch_at] if batch_at < len(row) else ""
+                if not grouped:
+                    pieces.setdefault(batch, []).append(row)
+                elif runs and runs[-1][0] == batch:
+                    runs[-1][1].append(row)
+                else:
+                    runs.append((batch, [row]))
+            for batch, piece in runs if grouped else pieces.items():
+                if batch in finished:
+                    raise ValueError(f"{final_csv}: rows for batch {batch!r} are not contiguous; "
+                                     "read it without grouped=True")
+                if grouped and current is not None and batch != current:
+                    finished.add(current)
+                    if current != "ALL":
+                        yield current, prepare_timetable(header, buckets.pop(current), courses)
+                    else:
+                        buckets.pop(current)
+                current = batch if grouped else None
+                buckets.add(batch, piece)
+
+        for batch in sorted(buckets.batches()):
+            batch_rows = buckets.pop(batch)
+            if batch and batch != "ALL":
+                yield batch, prepare_timetable(header, batch_rows, courses)
+    finally:
+        reader.close()
+        buckets.close()
+
+
+# Distinct class time ranges of the whole file, from one pass that keeps
+# only the Time column, so streamed batches can share the lattice
+def scan_time_ranges(final_csv):
+    reader = iter_csv(final_csv)
+    try:
+        header = next(reader)
+        check_columns(header, final_csv)
+        time_at = header.index("Time")
+        times = {row[time_at] for row in reader if time_at < len(row) and row[time_at]}
+    finally:
+        reader.close()
+    try:
+        return [parse_range(time_slot) for time_slot in times]
+    except ValueError as e:
+        raise ValueError(f"{final_csv}: unparseable Time value ({e})") from None
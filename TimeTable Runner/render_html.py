@@ -0,0 +1,74 @@
+from html import escape
+from string import Template
+
+# Page template and row/cell snippets, compiled once at import; rendering
+# a grid is then string formatting only
+_PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$name</title>
+<style>
+body { font-family: Calibri, Arial, sans-serif; font-size: 11pt; }
+h1, h2, h3 { text-align: center; margin: 4px 0; }
+h1 { color: #000080; font-size: 14pt; }
+h2 { font-size: 12pt; }
+h3 { font-size: 11pt; }
+table { border-collapse: collapse; margin-top: 16px; }
+td, th { border: 1px solid #000; padding: 4px; }
+.grid th { background: #FFCC66; }
+.grid td { text-align: center; vertical-align: middle; white-space: pre-line; }
+.courses th { background: #BBBBBB; text-align: left; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<h2>$subtitle</h2>
+<h3>$caption</h3>
+<table class="grid">
+<thead><tr><th>Day / Time</th>$time_headers</tr></thead>
+<tbody>
+$day_rows</tbody>
+</table>
+<table class="courses">
+<thead><tr><th>Sl.No.</th><th>Course Code</th><th>Course Title</th><th>Credits (L-T-P-C)</th><th>Faculty</th></tr></thead>
+<tbody>
+$course_rows</tbody>
+</table>
+</body>
+</html>
+""")
+
+_TIME_HEADER = "<th>{}</th>".format
+_DAY_ROW = "<tr><th>{}</th>{}</tr>\n".format
+_CELL = '<td class="{}" colspan="{}" style="background:#{}">{}</td>'.format
+_EMPTY_CELL = "<td></td>"
+_COURSE_ROW = ('<tr><td>{}</td><td style="background:#{}">{}</td><td>{}</td>'
+               '<td>{}</td><td>{}</td></tr>\n').format
+
+
+def _cell(cell):
+    if cell is None:
+        return _EMPTY_CELL
+    return _CELL(cell.kind, cell.span, cell.color, escape(str(cell.text)))
+
+
+# One grid.TimetableGrid as a standalone HTML page
+def render_html(grid):
+    return _PAGE.substitute(
+        name=escape(grid.name),
+        title=escape(str(grid.title)),
+        subtitle=escape(str(grid.subtitle)),
+        caption=escape(str(grid.caption)),
+        time_headers="".join(_TIME_HEADER(escape(slot.label)) for slot in grid.time_slots),
+        day_rows="".join(_DAY_ROW(day.label, "".join(map(_cell, day.cells)))
+                         for day in grid.days),
+        course_rows="".join(_COURSE_ROW(course.number, course.color, escape(str(course.code)),
+                                        escape(str(course.name)), escape(str(course.credits)),
+                                        escape(str(course.faculty)))
+                            for course in grid.courses),
+    )
+
+
+def write_html(grid, f):
+    f.write(render_html(grid).encode("utf-8"))
@@ -0,0 +1,86 @@
+import hashlib
+from datetime import datetime, timedelta
+
+WEEKDAYS = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4,
+            "Saturday": 5, "Sunday": 6}
+
+PRODID = "-//Time_table_automation//finalRun//EN"
+
+
+# Escape a TEXT value (RFC 5545 section 3.3.11)
+def _text(value):
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+
+# Fold a content line to 75 octets, continuation lines starting with a space
+def _fold(line):
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def _stamp(moment):
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+# First date on or after `term_start` that falls on `day`
+def first_occurrence(term_start, day):
+    return term_start + timedelta(days=(WEEKDAYS[day] - term_start.weekday()) % 7)
+
+
+# Yield the content lines of a calendar with one weekly recurring event per
+# lesson of the grid (grid.lessons: overlapping lessons each get one),
+# starting in the week of `term_start` (a date) and repeating `weeks` times
+# (forever if None). Times are floating local times; UIDs depend only on
+# the lesson, so re-imports update in place.
+def iter_ics(grid, term_start, timestamp, weeks=None):
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield f"PRODID:{PRODID}"
+    yield "CALSCALE:GREGORIAN"
+    yield f"X-WR-CALNAME:{_text(grid.name)}"
+    rule = "RRULE:FREQ=WEEKLY" + (f";COUNT={weeks}" if weeks is not None else "")
+    seen = set()
+    for day in sorted((day for day in grid.lessons if day in WEEKDAYS), key=WEEKDAYS.get):
+        date = first_occurrence(term_start, day)
+        midnight = datetime(date.year, date.month, date.day)
+        for cell in grid.lessons[day]:
+            base = f"{grid.view}|{grid.name}|{day}|{cell.start}|{cell.course}"
+            # The same course twice at the same time (e.g. in two rooms)
+            # gets numbered UIDs after the first
+            key, n = base, 1
+            while key in seen:
+                n += 1
+                key = f"{base}|{n}"
+            seen.add(key)
+            uid = hashlib.sha1(key.encode("utf-8")).hexdigest()
+            yield "BEGIN:VEVENT"
+            yield f"UID:{uid}@timetable"
+            yield f"DTSTAMP:{_stamp(timestamp)}Z"
+            yield f"DTSTART:{_stamp(midnight + timedelta(minutes=cell.start))}"
+            yield f"DTEND:{_stamp(midnight + timedelta(minutes=cell.end))}"
+            yield rule
+            yield f"SUMMARY:{_text(f'{cell.course} ({cell.type})')}"
+            yield f"LOCATION:{_text(f'Room {cell.room}')}"
+            yield f"DESCRIPTION:{_text(f'{cell.faculty}, {cell.batch}')}"
+            yield "END:VEVENT"
+    yield "END:VCALENDAR"
+
+
+def render_ics(grid, term_start, timestamp, weeks=None):
+    return "".join(_fold(line) + "\r\n" for line in iter_ics(grid, term_start, timestamp, weeks))
+
+
+def write_ics(grid, f, term_start, timestamp, weeks=None):
+    f.write(render_ics(grid, term_start, timestamp, weeks).encode("utf-8"))
@@ -0,0 +1,30 @@
+import json
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _cell(cell):
+    return None if cell is None else cell._asdict()
+
+
+# Yield a grid.TimetableGrid as JSON text piece by piece (one day row or
+# course at a time), so even a very large timetable never sits in memory
+# as a single string
+def iter_json(grid):
+    yield "{"
+    for field in ("name", "view", "title", "subtitle", "caption"):
+        yield f"{_dumps(field)}: {_dumps(getattr(grid, field))}, "
+    yield f'"time_slots": {_dumps([slot._asdict() for slot in grid.time_slots])}, '
+    yield '"days": ['
+    for i, day in enumerate(grid.days):
+        yield (", " if i else "") + _dumps({"label": day.label, "day": day.day,
+                                             "cells": [_cell(cell) for cell in day.cells]})
+    yield '], "courses": ['
+    for i, course in enumerate(grid.courses):
+        yield (", " if i else "") + _dumps(course._asdict())
+    yield "]}\n"
+
+
+def write_json(grid, f):
+    for piece in iter_json(grid):
+        f.write(piece.encode("utf-8"))
@@ -0,0 +1,172 @@
+import re
+from copy import copy
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from zipfile import ZipFile, ZipInfo
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Alignment, Border, Side, Font, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.xml.functions import tostring
+
+from layout import (CAPTION, GRID_CELL, LABEL, RENDER_MODES, SUBTITLE, TABLE_CELL, TABLE_HEADER,
+                    TIME_HEADER, TITLE)
+
+# Earliest date a zip entry can carry
+ZIP_EPOCH = datetime(1980, 1, 1)
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_CENTER = Alignment(horizontal='center', vertical='center')
+_CENTER_WRAP = Alignment(horizontal='center', vertical='center', wrap_text=True)
+_BOLD = Font(bold=True)
+
+
+def _fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+# Style definitions shared by every cell that uses them
+_BASE_STYLES = {
+    TITLE: dict(font=Font(bold=True, size=14, color="000080"), alignment=_CENTER),
+    SUBTITLE: dict(font=Font(bold=True, size=12), alignment=_CENTER),
+    CAPTION: dict(font=Font(bold=True, size=11), alignment=_CENTER),
+    LABEL: dict(font=_BOLD, fill=_fill("FFCC66")),
+    TIME_HEADER: dict(font=_BOLD, fill=_fill("FFCC66"), alignment=_CENTER),
+    GRID_CELL: dict(border=_BORDER),
+    TABLE_HEADER: dict(font=_BOLD, fill=_fill("BBBBBB"), border=_BORDER),
+    TABLE_CELL: dict(border=_BORDER),
+}
+
+
+def _style_definition(name):
+    if name in _BASE_STYLES:
+        return _BASE_STYLES[name]
+    if name.startswith("tt_grid_"):
+        return dict(fill=_fill(name[len("tt_grid_"):]), alignment=_CENTER_WRAP, border=_BORDER)
+    if name.startswith("tt_code_"):
+        return dict(fill=_fill(name[len("tt_code_"):]), border=_BORDER)
+    raise KeyError(name)
+
+
+# Complete keyword arguments of a named style. The font, fill and border
+# objects are built once per process and shared by every workbook it
+# writes (a workbook only ever stores them by value).
+@lru_cache(maxsize=None)
+def _style_arguments(name):
+    definition = dict(_style_definition(name))
+    definition.setdefault("font", copy(DEFAULT_FONT))
+    definition.setdefault("border", copy(DEFAULT_BORDER))
+    return definition
+
+
+# Register each style used by the layouts once on the workbook and return
+# the resolved style arrays by name, so cells can share them without the
+# per-assignment name lookup of `cell.style = name`
+def register_styles(wb, layouts):
+    names = set()
+    for layout in layouts:
+        for cells in layout.rows.values():
+            names.update(style for _, _, style in cells if style)
+    arrays = {}
+    for name in sorted(names):
+        style = NamedStyle(name=name, **_style_arguments(name))
+        wb.add_named_style(style)
+        arrays[name] = style.as_tuple()
+    return arrays
+
+
+def _write_standard(layout, ws, styles):
+    ws.title = layout.title
+    for cell_range in layout.merges:
+        ws.merge_cells(cell_range)
+    for row_idx, cells in layout.rows.items():
+        for col_idx, value, style in cells:
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            if style:
+                cell._style = copy(styles[style])
+    for letter, width in layout.widths.items():
+        ws.column_dimensions[letter].width = width
+    for row_idx, height in layout.heights.items():
+        ws.row_dimensions[row_idx].height = height
+
+
+def _write_streaming(wb, layout, styles):
+    ws = wb.create_sheet(title=layout.title)
+    # Dimensions must be known before the first row is streamed out
+    for letter, width in layout.widths.items():
+        ws.column_dimensions[letter].width = width
+    for row_idx, height in layout.heights.items():
+        ws.row_dimensions[row_idx].height = height
+    for cell_range in layout.merges:
+        ws.merged_cells.add(CellRange(cell_range))
+
+    last_row = max(layout.rows, default=0)
+    for row_idx in range(1, last_row + 1):
+        row = []
+        for col_idx, value, style in sorted(layout.rows.get(row_idx, ()), key=lambda c: c[0]):
+            row.extend([None] * (col_idx - 1 - len(row)))
+            cell = WriteOnlyCell(ws, value=value)
+            if style:
+                cell._style = copy(styles[style])
+            row.append(cell)
+        ws.append(row)
+
+
+# Excel limits sheet titles to 31 characters and forbids a few symbols;
+# titles must also be unique within a workbook
+def unique_sheet_titles(titles):
+    used = set()
+    result = []
+    for title in titles:
+        base = re.sub(r'[\\/*?:\[\]]', '_', str(title))[:31] or "Sheet"
+        candidate, n = base, 1
+        while candidate.lower() in used:
+            n += 1
+            suffix = f"~{n}"
+            candidate = base[:31 - len(suffix)] + suffix
+        used.add(candidate.lower())
+        result.append(candidate)
+    return result
+
+
+# Render one or more sheet layouts into a single workbook
+def build_workbook(layouts, mode="standard"):
+    if mode not in RENDER_MODES:
+        raise ValueError(f"unknown render mode {mode!r}, expected one of {', '.join(RENDER_MODES)}")
+    wb = Workbook(write_only=(mode == "streaming"))
+    styles = register_styles(wb, layouts)
+    titles = unique_sheet_titles(layout.title for layout in layouts)
+    layouts = [layout._replace(title=title) for layout, title in zip(layouts, titles)]
+    for i, layout in enumerate(layouts):
+        if mode == "streaming":
+            _write_streaming(wb, layout, styles)
+        else:
+            _write_standard(layout, wb.active if i == 0 else wb.create_sheet(), styles)
+    return wb
+
+
+# Serialize a workbook with fixed timestamps so the same input always
+# produces the same bytes, whichever process or run wrote it
+def workbook_bytes(wb, timestamp):
+    buffer = BytesIO()
+    wb.save(buffer)
+    wb.properties.created = timestamp
+    wb.properties.modified = timestamp
+    date_time = max(timestamp, ZIP_EPOCH).timetuple()[:6]
+    
+    output = BytesIO()
+    with ZipFile(buffer) as source, ZipFile(output, "w") as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == "docProps/core.xml":
+                data = tostring(wb.properties.to_tree())
+            entry = ZipInfo(info.filename, date_time=date_time)
+            entry.compress_type = info.compress_type
+            entry.external_attr = info.external_attr
+            target.writestr(entry, data)
+    return output.getvalue()
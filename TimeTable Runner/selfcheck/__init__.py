@@ -0,0 +1,2 @@
+# Randomized cross-checks of the indexed searches against brute force.
+# Run from the "TimeTable Runner" directory:  python -m selfcheck --help
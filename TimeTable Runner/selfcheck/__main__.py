@@ -0,0 +1,136 @@
+import argparse
+import random
+import sys
+
+from availability import _first_fit, build_availability, first_free, is_free
+from intervals import format_range
+from loader import SHARED_KEYS, Lesson
+from validate import CLASH_KINDS, Clash, _same_lesson, find_clashes
+
+DAYS = ["Monday", "Tuesday", "Wednesday"]
+
+# Few keys, times on a 5-minute grid and placeholders mixed in, so clashes,
+# touching lessons and shared keys are all common
+ROOMS = ["101", "102", "L206", "N/A", ""]
+FACULTY = ["Dr. A", "Dr. B", "Dr. C", "Guest Faculty", "N/A"]
+BATCHES = ["CSE_A_2023", "CSE_B_2023", "ECE_2023", "ALL"]
+COURSES = ["CS101", "CS102", "MA201"]
+
+
+def random_lessons(rng, count):
+    lessons = []
+    for _ in range(count):
+        start = rng.randrange(8 * 60, 18 * 60, 5)
+        end = start + rng.choice([5, 30, 55, 60, 90, 120])
+        lessons.append(Lesson(rng.choice(DAYS), format_range(start, end), rng.choice(ROOMS),
+                              rng.choice(BATCHES), rng.choice(COURSES), "LECTURE",
+                              rng.choice(FACULTY), None, None, start, end))
+        if rng.random() < 0.1:
+            # The same lesson taught to another batch at the same time
+            lessons.append(lessons[-1]._replace(Batch=rng.choice(BATCHES)))
+    return lessons
+
+
+# validate.find_clashes by comparing every pair of lessons
+def brute_clashes(lessons, kinds=CLASH_KINDS):
+    clashes = []
+    for kind in kinds:
+        column = Lesson._fields.index(kind)
+        found = []
+        for i, a in enumerate(lessons):
+            for j in range(i + 1, len(lessons)):
+                b = lessons[j]
+                key = a[column]
+                if (not key or key in SHARED_KEYS.get(kind, ()) or b[column] != key
+                        or a.Day != b.Day or not (a.Start < b.End and b.Start < a.End)):
+                    continue
+                if kind != "Batch" and _same_lesson(a, b):
+                    continue
+                found.append(Clash(kind, key, a.Day, i, j))
+        found.sort(key=lambda clash: (clash.key, clash.day, clash.first, clash.second))
+        clashes.extend(found)
+    return clashes
+
+
+def check_clashes(rng, trials):
+    for trial in range(trials):
+        lessons = random_lessons(rng, rng.randrange(0, 60))
+        expected = brute_clashes(lessons)
+        found = find_clashes(lessons)
+        if found != expected:
+            return f"find_clashes, trial {trial}: {len(found)} clash(es), expected {len(expected)}"
+    return None
+
+
+# availability._first_fit by walking the free ranges in order
+def brute_first_fit(agenda, minutes, after=None):
+    for start, end in agenda.free:
+        if after is not None and start <= after:
+            if end - after >= minutes:
+                return after, end
+        elif end - start >= minutes:
+            return start, end
+    return None
+
+
+def brute_is_free(index, kind, key, day, start, end=None):
+    end = start + 1 if end is None else end
+    low, high = index.bounds
+    busy = index.schedules[kind][key][day].busy
+    return low <= start and end <= high and not any(s < end and start < e for s, e in busy)
+
+
+def check_availability(rng, trials):
+    for trial in range(trials):
+        lessons = random_lessons(rng, rng.randrange(1, 60))
+        index = build_availability(lessons)
+        low, high = index.bounds
+        kinds = [kind for kind, by_key in index.schedules.items() if by_key]
+        for _ in range(20 if kinds else 0):
+            kind = rng.choice(kinds)
+            key = rng.choice(list(index.schedules[kind]))
+            day = rng.choice(index.days)
+            agenda = index.schedules[kind][key][day]
+            minutes = rng.randrange(1, 240)
+            after = rng.choice([None, rng.randrange(low - 30, high + 30)])
+            if _first_fit(agenda, minutes, after) != brute_first_fit(agenda, minutes, after):
+                return (f"_first_fit, trial {trial}: {kind} {key} on {day}, {minutes} minutes "
+                        f"after {after}")
+            expected = None
+            for position in range(index.days.index(day), len(index.days)):
+                found = brute_first_fit(index.schedules[kind][key][index.days[position]], minutes,
+                                        after if index.days[position] == day else None)
+                if found is not None:
+                    expected = (index.days[position], *found)
+                    break
+            if first_free(index, kind, key, minutes, day, after) != expected:
+                return f"first_free, trial {trial}: {kind} {key} from {day} after {after}"
+            start = rng.randrange(low - 30, high + 30)
+            end = rng.choice([None, start + rng.randrange(1, 180)])
+            if is_free(index, kind, key, day, start, end) != brute_is_free(index, kind, key, day,
+                                                                           start, end):
+                return f"is_free, trial {trial}: {kind} {key} on {day} at {start}-{end}"
+    return None
+
+
+CHECKS = {"clashes": check_clashes, "availability": check_availability}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m selfcheck",
+                                     description="Compare the clash sweep and the availability "
+                                                 "searches with brute force on random timetables.")
+    parser.add_argument("--trials", type=int, default=300, help="random timetables per check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, check in CHECKS.items():
+        problem = check(random.Random(args.seed), args.trials)
+        print(f"{name}: {'ok' if problem is None else 'MISMATCH in ' + problem}")
+        failed = failed or problem is not None
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import argparse
+import os
+import sys
+from collections import namedtuple
+
+from cache import load_cached_timetable
+from loader import SHARED_KEYS, Lesson, count_comment_lines
+
+# Columns checked for double bookings (keys in loader.SHARED_KEYS are
+# exempt)
+CLASH_KINDS = ("Room", "Faculty", "Batch")
+
+# Two lessons booked into overlapping times for the same room, faculty
+# member or batch; `first` and `second` are positions in the lesson list
+Clash = namedtuple("Clash", ["kind", "key", "day", "first", "second"])
+
+
+class ClashError(ValueError):
+    def __init__(self, clashes, report):
+        super().__init__(report)
+        self.clashes = clashes
+
+
+def _same_lesson(a, b):
+    return a.Course == b.Course and a.Faculty == b.Faculty and a.Room == b.Room
+
+
+# Every pair of overlapping lessons per room, faculty member and batch.
+# The lessons are sorted by (day, start) once and swept for each kind,
+# keeping per key the lessons still running and their latest end; a lesson
+# starting before that end overlaps each of the running ones that ends
+# after its start.
+def find_clashes(lessons, kinds=CLASH_KINDS):
+    days = [lesson.Day for lesson in lessons]
+    starts = [lesson.Start for lesson in lessons]
+    ends = [lesson.End for lesson in lessons]
+    order = sorted(range(len(lessons)), key=list(zip(days, starts)).__getitem__)
+    clashes = []
+    for kind in kinds:
+        column = Lesson._fields.index(kind)
+        keys = [lesson[column] for lesson in lessons]
+        shared = SHARED_KEYS.get(kind, ())
+        found = []
+        running = {}
+        latest_end = {}
+        day = None
+        for position in order:
+            key = keys[position]
+            if not key or key in shared:
+                continue
+            if days[position] != day:
+                day = days[position]
+                running = {}
+                latest_end = {}
+            start = starts[position]
+            if latest_end.get(key, -1) <= start:
+                # Nothing of this key is still running
+                running[key] = [position]
+                latest_end[key] = ends[position]
+                continue
+            earlier = [other for other in running[key] if ends[other] > start]
+            for other in earlier:
+                # One lesson taught to several batches at once (same course,
+                # faculty and room) legitimately shares its room and faculty
+                if kind != "Batch" and _same_lesson(lessons[other], lessons[position]):
+                    continue
+                found.append(Clash(kind, key, day, min(other, position), max(other, position)))
+            earlier.append(position)
+            running[key] = earlier
+            latest_end[key] = max(latest_end[key], ends[position])
+        found.sort(key=lambda clash: (clash.key, clash.day, clash.first, clash.second))
+        clashes.extend(found)
+    return clashes
+
+
+# Line number of the first data row of a solver CSV (after the comment
+# lines and the header); row positions are reported relative to it
+def first_data_line(final_csv):
+    if isinstance(final_csv, (str, os.PathLike)):
+        return count_comment_lines(final_csv) + 2
+    return 1
+
+
+def format_clashes(lessons, clashes, first_line=1):
+    lines = [f"{len(clashes)} clash(es) found:"]
+    for clash in clashes:
+        a, b = lessons[clash.first], lessons[clash.second]
+        lines.append(f"  {clash.kind} {clash.key} on {clash.day}: "
+                     f"line {clash.first + first_line} ({a.Time} {a.Batch} {a.Course}) overlaps "
+                     f"line {clash.second + first_line} ({b.Time} {b.Batch} {b.Course})")
+    return "\n".join(lines)
+
+
+# Check the timetable before rendering: print the clashes, or raise
+# ClashError with the same report when `strict` is set
+def check_timetable(lessons, strict=False, first_line=1, kinds=CLASH_KINDS):
+    clashes = find_clashes(lessons, kinds)
+    if clashes:
+        report = format_clashes(lessons, clashes, first_line)
+        if strict:
+            raise ClashError(clashes, report)
+        print(f"⚠️ {report}")
+    return clashes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report room, faculty and batch double bookings in the solver output.")
+    parser.add_argument("final_csv", nargs="?", default="final_timetable.csv",
+                        help="solver output CSV (default: final_timetable.csv)")
+    parser.add_argument("--courses", dest="courses_csv", help="CSV with Course, Course_Name, Credits columns")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="keep the parsed timetable in DIR so runs on unchanged inputs skip parsing")
+    parser.add_argument("--kinds", default=",".join(CLASH_KINDS),
+                        help=f"comma-separated columns to check (default: {','.join(CLASH_KINDS)})")
+    args = parser.parse_args(argv)
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in CLASH_KINDS]
+    if unknown:
+        parser.error(f"unknown kind {', '.join(unknown)}")
+
+    lessons = load_cached_timetable(args.final_csv, args.courses_csv, args.cache_dir)
+    clashes = find_clashes(lessons, kinds)
+    if clashes:
+        print(format_clashes(lessons, clashes, first_data_line(args.final_csv)))
+        return 1
+    print(f"No clashes in {len(lessons)} lessons")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import re
+from collections import namedtuple
+
+from loader import SHARED_KEYS, Lesson
+
+# One way of slicing the timetable into sheets:
+#   column   column the lessons are grouped by
+#   label    shown before the key in captions and sheet names
+#   caption  third title row ({name}, {classroom} are filled in)
+#   cell     grid cell text, formatted with the lesson as {e}
+#   prefix   file name prefix (batch files keep their original names)
+#   skip     keys that never get a sheet of their own (the shared
+#            placeholders of loader.SHARED_KEYS)
+View = namedtuple("View", ["name", "column", "label", "caption", "cell", "prefix", "skip"])
+
+VIEWS = {
+    "batch": View("batch", "Batch", "Batch", "Batch: {name}, Class Room: {classroom}",
+                  "{e.Course}\n{e.Type}\nRoom: {e.Room}\n{e.Faculty}", "", SHARED_KEYS["Batch"]),
+    "faculty": View("faculty", "Faculty", "Faculty", "Faculty: {name}",
+                    "{e.Course}\n{e.Type}\nRoom: {e.Room}\n{e.Batch}", "Faculty_",
+                    SHARED_KEYS["Faculty"]),
+    "room": View("room", "Room", "Room", "Room: {name}",
+                 "{e.Course}\n{e.Type}\n{e.Batch}\n{e.Faculty}", "Room_", SHARED_KEYS["Room"]),
+}
+
+BATCH_VIEW = VIEWS["batch"]
+
+
+def get_views(names):
+    unknown = [name for name in names if name not in VIEWS]
+    if unknown:
+        raise ValueError(f"unknown view {', '.join(map(repr, unknown))}, "
+                         f"expected one of {', '.join(VIEWS)}")
+    return [VIEWS[name] for name in names]
+
+
+# Name used for a view's sheet in messages, manifests and combined
+# workbooks; batches are still known by their bare name
+def view_label(view, key):
+    return str(key) if view.name == "batch" else f"{view.label} {key}"
+
+
+def view_file_name(view, key, extension="xlsx"):
+    if view.name == "batch":
+        return f"{key}_Timetable.{extension}"
+    safe = re.sub(r"[^\w-]+", "_", str(key)).strip("_") or "unknown"
+    return f"{view.prefix}{safe}_Timetable.{extension}"
+
+
+# {view name: [(key, row positions), ...]} in key order, built in one pass
+# over the lessons. Positions keep file order within a key, which decides
+# who wins a shared grid cell.
+def build_view_indexes(lessons, views):
+    groups = [(view, Lesson._fields.index(view.column), {}) for view in views]
+    for position, lesson in enumerate(lessons):
+        for _, column, positions in groups:
+            positions.setdefault(lesson[column], []).append(position)
+    return {view.name: [(key, positions[key]) for key in sorted(positions)
+                        if key and key not in view.skip]
+            for view, _, positions in groups}
+
+
+# Yield (view, key, lessons) for every sheet of the requested views, all
+# cut from the one parsed timetable
+def iter_view_lessons(lessons, views, indexes=None):
+    indexes = build_view_indexes(lessons, views) if indexes is None else indexes
+    for view in views:
+        for key, positions in indexes[view.name]:
+            yield view, key, [lessons[position] for position in positions]
@@ -0,0 +1,46 @@
+import os
+import time
+
+# Seconds between checks of the watched files, and how long they must stay
+# unchanged before a run starts (the solver writes its CSV in pieces)
+DEFAULT_POLL_INTERVAL = 0.2
+DEFAULT_DEBOUNCE = 0.25
+
+
+# (mtime, size) of each path, None for a file that does not exist (yet)
+def file_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+# Call on_change() once, then again every time one of `paths` changes and
+# has been left alone for `debounce` seconds, so a burst of writes leads to
+# a single run. Polls with os.stat only; stops after `max_runs` runs (if
+# given) or when interrupted.
+def watch_files(paths, on_change, interval=DEFAULT_POLL_INTERVAL, debounce=DEFAULT_DEBOUNCE,
+                max_runs=None):
+    paths = [path for path in paths if path]
+    seen = file_signature(paths)
+    on_change()
+    runs = 1
+    while max_runs is None or runs < max_runs:
+        time.sleep(interval)
+        current = file_signature(paths)
+        if current == seen:
+            continue
+        while True:
+            time.sleep(debounce)
+            latest = file_signature(paths)
+            if latest == current:
+                break
+            current = latest
+        seen = current
+        on_change()
+        runs += 1